@@ -0,0 +1,163 @@
+# analysis_cache.py
+import os
+import copy
+import json
+import time
+import pickle
+import hashlib
+import threading
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from typing import Optional
+
+import analyze_financial
+import fundamental_trends
+from analyze_financial import analyze_financial_performance
+from price_cache import CACHE_DIR
+
+ANALYSIS_CACHE_DIR = os.path.join(CACHE_DIR, 'analysis')
+
+# عدد النتائج في الذاكرة، ومدة صلاحية الملفات على القرص (يوم تداول)
+MEMORY_CACHE_SIZE = 128
+DISK_TTL = 24 * 60 * 60
+
+
+def _code_version() -> str:
+    """بصمة كود التحليل: أي تعديل على الموديولات يبطل النتائج المخزنة تلقائياً."""
+    h = hashlib.blake2b(digest_size=8)
+    for module in (analyze_financial, fundamental_trends):
+        with open(module.__file__, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+CODE_VERSION = _code_version()
+
+_memory = OrderedDict()
+_lock = threading.Lock()
+
+
+# ===============================
+# Content Hash
+# ===============================
+
+def _update_frame(h, df):
+    """إضافة محتوى القائمة (القيم والفهارس) إلى البصمة."""
+    if df is None:
+        h.update(b'<none>')
+        return
+    h.update(repr((df.shape, tuple(df.index), tuple(df.columns))).encode())
+    try:
+        h.update(np.ascontiguousarray(df.to_numpy(dtype=float)).tobytes())
+    except (TypeError, ValueError):
+        # قيم غير رقمية: بصمة pandas لكل صف
+        h.update(pd.util.hash_pandas_object(df.astype(str), index=False).to_numpy().tobytes())
+
+
+def analysis_key(income_stmt, balance_sheet, cash_flow, quarterly_income, quarterly_balance,
+                 quarterly_cash, basic_info, industry_pe=None) -> str:
+    """مفتاح التخزين: بصمة القوائم الست و basic_info و industry_pe ونسخة الكود."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(CODE_VERSION.encode())
+    for df in (income_stmt, balance_sheet, cash_flow, quarterly_income, quarterly_balance, quarterly_cash):
+        _update_frame(h, df)
+    h.update(json.dumps(basic_info or {}, sort_keys=True, default=str).encode())
+    h.update(repr(industry_pe).encode())
+    return h.hexdigest()
+
+
+# ===============================
+# Disk Tier
+# ===============================
+
+def _disk_path(key: str) -> str:
+    return os.path.join(ANALYSIS_CACHE_DIR, f"{key}.pkl")
+
+
+def _load_disk(key: str, ttl: float) -> Optional[dict]:
+    path = _disk_path(key)
+    try:
+        if time.time() - os.path.getmtime(path) >= ttl:
+            return None
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    except (OSError, pickle.PickleError, EOFError):
+        return None
+
+
+def _store_disk(key: str, analysis: dict):
+    os.makedirs(ANALYSIS_CACHE_DIR, exist_ok=True)
+    # كتابة ذرية حتى لا تقرأ عملية أخرى ملفاً ناقصاً
+    tmp_path = f"{_disk_path(key)}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(analysis, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, _disk_path(key))
+
+
+def _remember(key: str, analysis: dict):
+    with _lock:
+        _memory[key] = analysis
+        _memory.move_to_end(key)
+        while len(_memory) > MEMORY_CACHE_SIZE:
+            _memory.popitem(last=False)
+
+
+# ===============================
+# Public API
+# ===============================
+
+def cached_financial_performance(
+    income_stmt: pd.DataFrame,
+    balance_sheet: pd.DataFrame,
+    cash_flow: pd.DataFrame,
+    quarterly_income: pd.DataFrame,
+    quarterly_balance: pd.DataFrame,
+    quarterly_cash: pd.DataFrame,
+    basic_info: dict,
+    industry_pe: float = None,
+    use_disk: bool = False,
+    ttl: float = DISK_TTL
+) -> dict:
+    """
+    نفس analyze_financial_performance مع تخزين النتيجة حسب بصمة المحتوى:
+    ذاكرة LRU أولاً، ثم القرص (اختياري، use_disk) ضمن مدة ttl، وإلا يُعاد الحساب.
+    تُعاد نسخة مستقلة حتى لا يغير المستدعي النتيجة المخزنة.
+    """
+    key = analysis_key(income_stmt, balance_sheet, cash_flow, quarterly_income,
+                       quarterly_balance, quarterly_cash, basic_info, industry_pe)
+
+    with _lock:
+        analysis = _memory.get(key)
+        if analysis is not None:
+            _memory.move_to_end(key)
+    if analysis is None and use_disk:
+        analysis = _load_disk(key, ttl)
+        if analysis is not None:
+            _remember(key, analysis)
+    if analysis is None:
+        analysis = analyze_financial_performance(
+            income_stmt, balance_sheet, cash_flow,
+            quarterly_income, quarterly_balance, quarterly_cash,
+            basic_info, industry_pe
+        )
+        _remember(key, analysis)
+        if use_disk:
+            try:
+                _store_disk(key, analysis)
+            except OSError:
+                pass
+    return copy.deepcopy(analysis)
+
+
+def clear_analysis_cache(memory: bool = True, disk: bool = False):
+    """مسح النتائج المخزنة في الذاكرة و/أو على القرص."""
+    if memory:
+        with _lock:
+            _memory.clear()
+    if disk and os.path.isdir(ANALYSIS_CACHE_DIR):
+        for name in os.listdir(ANALYSIS_CACHE_DIR):
+            try:
+                os.remove(os.path.join(ANALYSIS_CACHE_DIR, name))
+            except OSError:
+                pass
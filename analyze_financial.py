@@ -1,6 +1,7 @@
 import pandas as pd
 import numpy as np
 import warnings
+from fundamental_trends import TREND_ITEMS, compute_trend_metrics, score_trends
 warnings.filterwarnings('ignore')
 
 def debug_dataframes(income_stmt, balance_sheet, cash_flow, symbol=""):
@@ -20,100 +21,159 @@ def debug_dataframes(income_stmt, balance_sheet, cash_flow, symbol=""):
     
     return True
 
-def safe_get_value(df, key, column_idx=0, default=0.0):
+# الأسماء البديلة لكل بند حسب الشركة/المصدر (بالترتيب)
+KEY_VARIATIONS = {
+    'Total Revenue': [
+        'Total Revenue', 'Revenue', 'Net Sales', 'Total Net Revenues', 'Net Revenue',
+        'Sales', 'Net Sales Revenue', 'Total Revenues'
+    ],
+    'Net Income': [
+        'Net Income', 'Net Income Common Stockholders', 
+        'Net Income Applicable To Common Shares', 'Net Income Available to Common Stockholders',
+        'Net Earnings', 'Net Income (Loss)'
+    ],
+    'Gross Profit': [
+        'Gross Profit', 'Total Gross Profit', 'Gross Income'
+    ],
+    'Operating Income': [
+        'Operating Income', 'Operating Income Or Loss', 'Income From Operations',
+        'Operating Profit', 'Operating Earnings'
+    ],
+    'Total Assets': [
+        'Total Assets', 'Assets', 'Total Assets'
+    ],
+    'Total Debt': [
+        'Total Debt', 'Total Debt And Capital Lease Obligation', 
+        'Long Term Debt And Capital Lease Obligation', 'Net Debt',
+        'Long Term Debt', 'Short Long Term Debt Total', 'Total Debt',
+        'Current Debt And Capital Lease Obligation', 'Short Term Debt'
+    ],
+    'Stockholders Equity': [
+        'Stockholders Equity', 'Total Stockholders Equity', 
+        'Total Equity Gross Minority Interest', 'Shareholders Equity',
+        'Total Equity', 'Stockholders\' Equity'
+    ],
+    'Current Assets': [
+        'Current Assets', 'Total Current Assets'
+    ],
+    'Current Liabilities': [
+        'Current Liabilities', 'Total Current Liabilities'
+    ],
+    'Operating Cash Flow': [
+        'Operating Cash Flow', 'Total Cash From Operating Activities', 
+        'Cash Flow From Operations', 'Net Cash Provided By Operating Activities',
+        'Cash From Operating Activities', 'Operating Activities',
+        'Net Cash From Operating Activities', 'Cash Flow From Operating Activities',
+        'Cash Flow From Continuing Operating Activities'
+    ],
+    'Capital Expenditure': [
+        'Capital Expenditure', 'Capital Expenditures', 'Purchase Of PPE',
+        'Purchases Of Property Plant And Equipment', 'Capital Spending',
+        'Purchase Of Property And Equipment', 'Capex', 'Purchase Of Business',
+        'Purchase Of Property, Plant And Equipment', 'Purchase of Property, Plant, and Equipment',
+        'Purchases of property, plant and equipment'
+    ],
+    'EBIT': [
+        'EBIT', 'Earnings Before Interest And Taxes', 'Operating Income',
+        'Operating Profit'
+    ],
+    'Interest Expense': [
+        'Interest Expense', 'Interest Expense Non Operating', 'Net Interest Expense',
+        'Interest Paid', 'Interest Expense, Net'
+    ],
+    'Inventory': [
+        'Inventory', 'Total Inventory', 'Inventories'
+    ],
+    'Common Stock': [
+        'Common Stock', 'Ordinary Shares Number', 'Share Issued',
+        'Common Shares Outstanding', 'Shares Outstanding'
+    ]
+}
+
+# تصنيف الصحة المالية: (أدنى درجة، التصنيف، الوصف) من الأعلى للأدنى
+HEALTH_TIERS = (
+    (85, 'Exceptional 🌟⭐', 'Outstanding financial performance across all metrics'),
+    (70, 'Excellent 🌟', 'Strong financial health with minor areas for optimization'),
+    (55, 'Good ✅', 'Solid performance with some improvement opportunities'),
+    (40, 'Average ⚠️', 'Mixed performance requiring attention to key areas'),
+    (25, 'Below Average 🟠', 'Concerning performance with significant improvement needed'),
+    (-np.inf, 'Poor 🔴', 'Weak financial position requiring immediate action'),
+)
+
+_MISSING = object()
+
+
+class ResolvedStatement:
     """
-    استخراج آمن للقيم من DataFrame مع خيارات احتياطية متعددة
+    قائمة مالية بعد تحويل فهرسها مرة واحدة إلى مواقع صفوف:
+    كل بند (أو اسمه البديل من KEY_VARIATIONS) يُحل إلى رقم صف، ثم كل قراءة
+    وصول مباشر للمصفوفة بدل البحث في df.index عند كل استدعاء.
     """
-    if df.empty or len(df.columns) <= column_idx:
-        return default
-        
-    # جرب المطابقة الدقيقة أولاً
-    if key in df.index:
-        try:
-            value = df.loc[key].iloc[column_idx]
-            return float(value) if pd.notna(value) else default
-        except:
+
+    def __init__(self, df: pd.DataFrame):
+        self.empty = df.empty
+        self.n_columns = len(df.columns)
+        self.values = df.to_numpy()
+        # اسم البند -> رقم الصف (None إن كان الاسم مكرراً)
+        self.positions = {}
+        for i, label in enumerate(df.index):
+            self.positions[label] = None if label in self.positions else i
+        # البند القياسي -> صفوف أسمائه البديلة الموجودة (بنفس ترتيب المحاولة)
+        self.aliases = {
+            key: [self.positions[v] for v in variations if self.positions.get(v) is not None]
+            for key, variations in KEY_VARIATIONS.items()
+        }
+
+    def get(self, key, column_idx=0, default=0.0):
+        """نفس نتيجة safe_get_value على الـ DataFrame الأصلي."""
+        if self.empty or self.n_columns <= column_idx:
             return default
-    
-    # جرب المطابقة الجزئية للاختلافات الشائعة
-    key_variations = {
-        'Total Revenue': [
-            'Total Revenue', 'Revenue', 'Net Sales', 'Total Net Revenues', 'Net Revenue',
-            'Sales', 'Net Sales Revenue', 'Total Revenues'
-        ],
-        'Net Income': [
-            'Net Income', 'Net Income Common Stockholders', 
-            'Net Income Applicable To Common Shares', 'Net Income Available to Common Stockholders',
-            'Net Earnings', 'Net Income (Loss)'
-        ],
-        'Gross Profit': [
-            'Gross Profit', 'Total Gross Profit', 'Gross Income'
-        ],
-        'Operating Income': [
-            'Operating Income', 'Operating Income Or Loss', 'Income From Operations',
-            'Operating Profit', 'Operating Earnings'
-        ],
-        'Total Assets': [
-            'Total Assets', 'Assets', 'Total Assets'
-        ],
-        'Total Debt': [
-            'Total Debt', 'Total Debt And Capital Lease Obligation', 
-            'Long Term Debt And Capital Lease Obligation', 'Net Debt',
-            'Long Term Debt', 'Short Long Term Debt Total', 'Total Debt',
-            'Current Debt And Capital Lease Obligation', 'Short Term Debt'
-        ],
-        'Stockholders Equity': [
-            'Stockholders Equity', 'Total Stockholders Equity', 
-            'Total Equity Gross Minority Interest', 'Shareholders Equity',
-            'Total Equity', 'Stockholders\' Equity'
-        ],
-        'Current Assets': [
-            'Current Assets', 'Total Current Assets'
-        ],
-        'Current Liabilities': [
-            'Current Liabilities', 'Total Current Liabilities'
-        ],
-        'Operating Cash Flow': [
-            'Operating Cash Flow', 'Total Cash From Operating Activities', 
-            'Cash Flow From Operations', 'Net Cash Provided By Operating Activities',
-            'Cash From Operating Activities', 'Operating Activities',
-            'Net Cash From Operating Activities', 'Cash Flow From Operating Activities',
-            'Cash Flow From Continuing Operating Activities'
-        ],
-        'Capital Expenditure': [
-            'Capital Expenditure', 'Capital Expenditures', 'Purchase Of PPE',
-            'Purchases Of Property Plant And Equipment', 'Capital Spending',
-            'Purchase Of Property And Equipment', 'Capex', 'Purchase Of Business',
-            'Purchase Of Property, Plant And Equipment', 'Purchase of Property, Plant, and Equipment',
-            'Purchases of property, plant and equipment'
-        ],
-        'EBIT': [
-            'EBIT', 'Earnings Before Interest And Taxes', 'Operating Income',
-            'Operating Profit'
-        ],
-        'Interest Expense': [
-            'Interest Expense', 'Interest Expense Non Operating', 'Net Interest Expense',
-            'Interest Paid', 'Interest Expense, Net'
-        ],
-        'Inventory': [
-            'Inventory', 'Total Inventory', 'Inventories'
-        ],
-        'Common Stock': [
-            'Common Stock', 'Ordinary Shares Number', 'Share Issued',
-            'Common Shares Outstanding', 'Shares Outstanding'
-        ]
-    }
-    
-    if key in key_variations:
-        for variation in key_variations[key]:
-            if variation in df.index:
-                try:
-                    value = df.loc[variation].iloc[column_idx]
-                    return float(value) if pd.notna(value) else default
-                except:
-                    continue
-    
-    return default
+
+        # المطابقة الدقيقة أولاً
+        row = self.positions.get(key, _MISSING)
+        if row is not _MISSING:
+            if row is None:
+                return default
+            try:
+                value = self.values[row, column_idx]
+                return float(value) if pd.notna(value) else default
+            except:
+                return default
+
+        # ثم الأسماء البديلة
+        for row in self.aliases.get(key, ()):
+            try:
+                value = self.values[row, column_idx]
+                return float(value) if pd.notna(value) else default
+            except:
+                continue
+
+        return default
+
+    def series(self, key) -> np.ndarray:
+        """قيم البند لكل الأعمدة (الفترات) دفعة واحدة بنفس قواعد get؛ المفقود NaN."""
+        if self.empty:
+            return np.full(self.n_columns, np.nan)
+        row = self.positions.get(key, _MISSING)
+        if row is _MISSING:
+            rows = self.aliases.get(key, ())
+            row = rows[0] if rows else None
+        if row is None:
+            return np.full(self.n_columns, np.nan)
+        return pd.to_numeric(pd.Series(self.values[row]), errors='coerce').to_numpy(dtype=float)
+
+
+def resolve_statement(df) -> ResolvedStatement:
+    """تحويل القائمة مرة واحدة (القوائم المحوّلة مسبقاً تُعاد كما هي)."""
+    return df if isinstance(df, ResolvedStatement) else ResolvedStatement(df)
+
+
+def safe_get_value(df, key, column_idx=0, default=0.0):
+    """
+    استخراج آمن للقيم من DataFrame مع خيارات احتياطية متعددة.
+    df يمكن أن يكون ResolvedStatement (resolve_statement) لتجنب البحث المتكرر في الفهرس.
+    """
+    return resolve_statement(df).get(key, column_idx, default)
 
 def get_cash_flow_data(cash_flow, income_stmt, basic_info):
     """
@@ -196,6 +256,59 @@ def get_balance_sheet_ratios(balance_sheet, basic_info):
     
     return total_debt, total_assets, debt_to_assets
 
+def analyze_financial_trends(
+    income_stmt,
+    cash_flow,
+    quarterly_income,
+    quarterly_cash
+) -> dict:
+    """
+    تحليل الاتجاه عبر كل الفترات المتاحة (وليس آخر فترتين فقط):
+    CAGR، هوامش الربح عبر السنوات وميلها، TTM من القوائم الربعية، ونمو 4 أرباع متحركة.
+    """
+    def items(income, cash):
+        income = resolve_statement(income if income is not None else pd.DataFrame())
+        cash = resolve_statement(cash if cash is not None else pd.DataFrame())
+        return {
+            key: (cash if key in ('Operating Cash Flow', 'Capital Expenditure') else income).series(key)
+            for key in TREND_ITEMS
+        }
+
+    metrics = compute_trend_metrics(items(income_stmt, cash_flow), items(quarterly_income, quarterly_cash))
+    trend_score, trend_rating = score_trends(metrics)
+
+    def value(key):
+        v = float(metrics[key][0])
+        return round(v, 2) if v == v else None
+
+    def history(key):
+        return [round(float(v), 2) if v == v else None for v in metrics[key][0]]
+
+    return {
+        'annual_periods': int(metrics['annual_periods'][0]),
+        'quarterly_periods': int(metrics['quarterly_periods'][0]),
+        'revenue_cagr_%': value('revenue_cagr_%'),
+        'net_income_cagr_%': value('net_income_cagr_%'),
+        'operating_cash_flow_cagr_%': value('operating_cash_flow_cagr_%'),
+        'revenue_growth_history_%': history('revenue_growth_history'),
+        'revenue_growth_consistency': value('revenue_growth_consistency'),
+        'gross_margin_history_%': history('gross_margin_history'),
+        'operating_margin_history_%': history('operating_margin_history'),
+        'net_margin_history_%': history('net_margin_history'),
+        'gross_margin_slope': value('gross_margin_slope'),
+        'operating_margin_slope': value('operating_margin_slope'),
+        'net_margin_slope': value('net_margin_slope'),
+        'ttm_revenue': value('ttm_revenue'),
+        'ttm_net_income': value('ttm_net_income'),
+        'ttm_operating_cash_flow': value('ttm_operating_cash_flow'),
+        'ttm_free_cash_flow': value('ttm_free_cash_flow'),
+        'rolling_4q_growth_%': value('rolling_4q_growth_%'),
+        'ttm_yoy_growth_%': value('ttm_yoy_growth_%'),
+        'quarterly_yoy_growth_%': value('quarterly_yoy_growth_%'),
+        'trend_score': int(trend_score[0]),
+        'trend_rating': str(trend_rating[0]),
+    }
+
 def analyze_financial_performance(
     income_stmt: pd.DataFrame,
     balance_sheet: pd.DataFrame,
@@ -221,6 +334,7 @@ def analyze_financial_performance(
         'valuation_analysis': {},
         'asset_efficiency': {},
         'risk_analysis': {},
+        'trend_analysis': {},
         'overall_score': 0,
         'health_rating': '',
         'health_description': '',
@@ -230,6 +344,11 @@ def analyze_financial_performance(
     recommendations = []
 
     try:
+        # تحويل فهارس القوائم مرة واحدة؛ كل safe_get_value بعدها وصول مباشر
+        income_stmt = resolve_statement(income_stmt)
+        balance_sheet = resolve_statement(balance_sheet)
+        cash_flow = resolve_statement(cash_flow)
+
         # ===== Revenue Analysis =====
         curr_rev = safe_get_value(income_stmt, 'Total Revenue', 0, 0.0)
         prev_rev = safe_get_value(income_stmt, 'Total Revenue', 1, curr_rev)
@@ -566,24 +685,19 @@ def analyze_financial_performance(
     final_score = max(0, min(100, score))
     analysis['overall_score'] = final_score
 
-    if final_score >= 85:
-        analysis['health_rating'] = 'Exceptional 🌟⭐'
-        analysis['health_description'] = 'Outstanding financial performance across all metrics'
-    elif final_score >= 70:
-        analysis['health_rating'] = 'Excellent 🌟'
-        analysis['health_description'] = 'Strong financial health with minor areas for optimization'
-    elif final_score >= 55:
-        analysis['health_rating'] = 'Good ✅'
-        analysis['health_description'] = 'Solid performance with some improvement opportunities'
-    elif final_score >= 40:
-        analysis['health_rating'] = 'Average ⚠️'
-        analysis['health_description'] = 'Mixed performance requiring attention to key areas'
-    elif final_score >= 25:
-        analysis['health_rating'] = 'Below Average 🟠'
-        analysis['health_description'] = 'Concerning performance with significant improvement needed'
-    else:
-        analysis['health_rating'] = 'Poor 🔴'
-        analysis['health_description'] = 'Weak financial position requiring immediate action'
+    for min_score, rating, description in HEALTH_TIERS:
+        if final_score >= min_score:
+            analysis['health_rating'] = rating
+            analysis['health_description'] = description
+            break
+
+    # ===== Multi-period Trends (لا يغير overall_score) =====
+    try:
+        analysis['trend_analysis'] = analyze_financial_trends(
+            income_stmt, cash_flow, quarterly_income, quarterly_cash
+        )
+    except Exception:
+        analysis['trend_analysis'] = {}
 
     # ===== Add compatibility keys for UI =====
     analysis['income_statement_analysis'] = {
@@ -591,4 +705,105 @@ def analyze_financial_performance(
         'profit_margin': analysis['profitability_analysis']['net_margin_%']
     }
 
-    return analysis
\ No newline at end of file
+    return analysis
+
+
+def analyze_financial_performance_batch(metrics: pd.DataFrame) -> pd.DataFrame:
+    """
+    نسخة متجهة من تقييم analyze_financial_performance لعدة أسهم دفعة واحدة.
+
+    - metrics: سهم لكل صف بأعمدة fundamental_store.compute_ratios
+      (revenue_growth_%، gross_margin_%، ROE_%، debt_to_equity، current_ratio ...)
+
+    Returns: نسخة من metrics مع الدرجات الفرعية و overall_score و health_rating
+    و health_description وتصنيفات الاتجاه و risk_level/risk_factors و recommendations
+    (فارغة كما في النسخة الفردية).
+    """
+    m = {col: metrics[col].to_numpy(dtype=float) for col in metrics.columns}
+    rev_growth = m['revenue_growth_%']
+    roe, roa = m['ROE_%'], m['ROA_%']
+    debt_to_equity, current_ratio = m['debt_to_equity'], m['current_ratio']
+    ocf, fcf = m['operating_cash_flow'], m['free_cash_flow']
+    pe, pb = m['P/E'], m['P/B']
+
+    # ===== Revenue =====
+    rev_cond = [rev_growth > 15, rev_growth > 7, rev_growth > 0, rev_growth > -10]
+    revenue_score = np.select(rev_cond, [20, 10, 5, -5], -15)
+    rev_trend = np.select(rev_cond, ['🚀 Excellent Growth', '➡️ Solid Growth', '📊 Modest Growth',
+                                     '📉 Declining Revenue'], '⚠️ Severe Decline')
+
+    # ===== Profitability =====
+    gross_margin, operating_margin, net_margin = m['gross_margin_%'], m['operating_margin_%'], m['net_margin_%']
+    margin_score = (
+        np.select([gross_margin > 40, gross_margin > 25], [10, 5], 0)
+        + np.select([operating_margin > 15, operating_margin > 8], [10, 5], 0)
+        + np.select([net_margin > 15, net_margin > 8, net_margin > 3], [15, 10, 5], 0)
+        + np.select([roe > 20, roe > 15, roe > 10], [15, 10, 5], 0)
+    )
+
+    # ===== Balance Sheet =====
+    debt_cond = [debt_to_equity < 0.3, debt_to_equity < 0.6, debt_to_equity < 1.0]
+    liq_cond = [current_ratio > 2.5, current_ratio > 1.5, current_ratio > 1.0]
+    balance_score = np.select(debt_cond, [15, 10, 5], -10) + np.select(liq_cond, [10, 8, 5], -10)
+    debt_trend = np.select(debt_cond, ['🟢 Conservative Leverage', '🟡 Moderate Leverage', '🟠 Higher Leverage'],
+                           '🔴 High Leverage Risk')
+    liq_trend = np.select(liq_cond, ['🟢 Excellent Liquidity', '🟡 Good Liquidity', '🟠 Adequate Liquidity'],
+                          '🔴 Liquidity Concern')
+
+    # ===== Cash Flow =====
+    cash_cond = [(ocf > 0) & (fcf > 0), ocf > 0, fcf > 0]
+    cash_score = np.select(cash_cond, [15, 10, 5], -15)
+    fcf_trend = np.select(cash_cond, ['🟢 Strong Cash Generation', '🟡 Positive Operating Cash Flow',
+                                      '🟠 Positive Free Cash Flow'], '🔴 Cash Flow Concerns')
+
+    # ===== Final Score and Rating =====
+    overall_score = np.clip(50 + revenue_score + margin_score + balance_score + cash_score, 0, 100)
+    tier_cond = [overall_score >= min_score for min_score, _, _ in HEALTH_TIERS[:-1]]
+    health_rating = np.select(tier_cond, [rating for _, rating, _ in HEALTH_TIERS[:-1]], HEALTH_TIERS[-1][1])
+    health_description = np.select(tier_cond, [description for _, _, description in HEALTH_TIERS[:-1]],
+                                   HEALTH_TIERS[-1][2])
+
+    # ===== Valuation =====
+    has_pe = ~np.isnan(pe) & (pe != 0)
+    pe_trend = np.where(has_pe, np.select(
+        [pe < 15, pe < 25, pe < 35],
+        ['🟢 Attractive Valuation', '🟡 Fair Valuation', '🟠 Higher Valuation'], '🔴 Expensive'
+    ), '⚪ No Comparison Available')
+    has_pb = ~np.isnan(pb) & (pb != 0)
+    pb_trend = np.where(has_pb, np.select(
+        [pb < 1, pb < 2, pb < 4],
+        ['🟢 Book Value Discount', '🟡 Reasonable P/B', '🟠 Higher P/B'], '🔴 High P/B Premium'
+    ), '⚪ P/B Not Available')
+    efficiency_rating = np.select([roa > 15, roa > 8, roa > 4], ['🟢 Excellent', '🟡 Good', '🟠 Average'], '🔴 Poor')
+
+    # ===== Risk =====
+    factors = np.column_stack([
+        debt_to_equity > 1.0,
+        (debt_to_equity > 0.6) & ~(debt_to_equity > 1.0),
+        current_ratio < 1.2,
+        rev_growth < -10,
+        fcf < 0,
+    ])
+    names = ['High leverage', 'Moderate leverage', 'Liquidity concerns', 'Declining revenue', 'Negative free cash flow']
+    high = factors[:, 0] | factors[:, 2] | factors[:, 3]
+    risk_level = np.where(high, 'High', np.where(factors[:, 1] | factors[:, 4], 'Medium', 'Low'))
+
+    result = metrics.copy()
+    result['revenue_score'] = revenue_score
+    result['margin_score'] = margin_score
+    result['balance_score'] = balance_score
+    result['cash_score'] = cash_score
+    result['overall_score'] = overall_score
+    result['health_rating'] = health_rating
+    result['health_description'] = health_description
+    result['trend'] = rev_trend
+    result['debt_trend'] = debt_trend
+    result['liquidity_trend'] = liq_trend
+    result['fcf_trend'] = fcf_trend
+    result['pe_trend'] = pe_trend
+    result['pb_trend'] = pb_trend
+    result['efficiency_rating'] = efficiency_rating
+    result['risk_level'] = risk_level
+    result['risk_factors'] = [[name for name, hit in zip(names, row) if hit] for row in factors]
+    result['recommendations'] = [[] for _ in range(len(result))]
+    return result
@@ -6,6 +6,8 @@ from dataclasses import dataclass
 from enum import Enum
 from typing import Dict, Tuple, Any, Optional
 
+from signal_codes import decode_signal, is_coded, signal_code
+
 class MarketCondition(Enum):
     TRENDING = "trending"
     RANGING = "ranging"
@@ -18,6 +20,16 @@ class SignalConfig:
     enable_logging: bool = True
     confidence_boost_threshold: float = 0.8
     max_histogram_weight: float = 2.0
+    compact_signals: bool = False  # أعمدة الإشارات كرموز int8 بدل النصوص
+
+def sr_zone_code(close: np.ndarray, s1: np.ndarray, r1: np.ndarray) -> np.ndarray:
+    """رمز SR_Zone لكل صف: ‎+1 Support، ‎-1 Resistance (له الأولوية)، 0 None."""
+    resistance = close >= r1 * 0.995
+    return signal_code(~resistance & (close <= s1 * 1.005), resistance)
+
+def classify_sr_zone(close: np.ndarray, s1: np.ndarray, r1: np.ndarray) -> np.ndarray:
+    """تصنيف Resistance/Support/None لكل صف (Resistance له الأولوية)."""
+    return decode_signal(sr_zone_code(close, s1, r1), 'SR_Zone')
 
 class AdaptiveTechnicalSignalAnalyzer:
     def __init__(self, config: Optional[SignalConfig] = None):
@@ -59,10 +71,118 @@ class AdaptiveTechnicalSignalAnalyzer:
         )
         self.logger = logging.getLogger('SignalAnalyzer')
 
+    # الإشارات المستخدمة في التقييم (MACD_Trade_Signal له وزن لكنه غير مستخدم في التقييم)
+    SCORED_SIGNALS = [
+        ('trend_indicators', 'Position_vs_SMA20'),
+        ('trend_indicators', 'Position_vs_SMA50'),
+        ('trend_indicators', 'EMA_signal'),
+        ('momentum_indicators', 'RSI_Signal'),
+        ('momentum_indicators', 'MACD_Histogram'),
+        ('momentum_indicators', 'Stoch_Signal'),
+        ('volume_indicators', 'OBV_Signal'),
+        ('volatility_indicators', 'BB_Signal'),
+        ('strength_indicators', 'ADX_Signal'),
+        ('support_resistance', 'SR_Zone'),
+    ]
+    CATEGORY_PREFIX = {
+        'trend_indicators': 'trend',
+        'momentum_indicators': 'momentum',
+        'volume_indicators': 'volume',
+        'volatility_indicators': 'volatility',
+        'strength_indicators': 'strength',
+        'support_resistance': 'sr',
+    }
+    IMPORTANT_CATEGORIES = ('trend', 'momentum', 'volume', 'strength', 'sr')
+    AGGREGATE_COLUMNS = ['Buy_Score', 'Sell_Score', 'Net_Score',
+                         'Important_Buy_Score', 'Important_Sell_Score', 'Important_Net_Score']
+
+    @property
+    def score_columns(self):
+        cols = []
+        for prefix in self.CATEGORY_PREFIX.values():
+            cols += [f'{prefix}_buy_score', f'{prefix}_sell_score']
+        return cols
+
+    def encode_signal_states(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        ترميز كل إشارة كـ int8: ‎+1 شراء، ‎-1 بيع، 0 محايد.
+        Returns: مصفوفة (عدد الصفوف × عدد الإشارات) بترتيب SCORED_SIGNALS
+        """
+        n = len(df)
+        close = df['Close'].to_numpy()
+
+        def labels(col, buy, sell):
+            if col not in df.columns:
+                return np.zeros(n, dtype=np.int8)
+            if is_coded(df[col]):
+                return df[col].to_numpy()
+            values = df[col].to_numpy()
+            return np.where(values == buy, 1, np.where(values == sell, -1, 0)).astype(np.int8)
+
+        def sign(values):
+            return np.sign(np.nan_to_num(values, nan=0.0)).astype(np.int8)
+
+        encoders = {
+            # Above/Below: غياب SMA يُعامل كـ Below كما في الأصل
+            'Position_vs_SMA20': lambda: np.where(close > df['SMA_20'].to_numpy(), 1, -1).astype(np.int8),
+            'Position_vs_SMA50': lambda: np.where(close > df['SMA_50'].to_numpy(), 1, -1).astype(np.int8),
+            'EMA_signal': lambda: labels('EMA_signal', 'Golden Cross', 'Death Cross'),
+            'RSI_Signal': lambda: labels('RSI_Signal', 'Buy', 'Sell'),
+            'MACD_Histogram': lambda: sign(df['MACD_Histogram'].to_numpy(dtype=float))
+                                      if 'MACD_Histogram' in df.columns else np.zeros(n, dtype=np.int8),
+            'Stoch_Signal': lambda: labels('Stoch_Signal', 'Buy', 'Sell'),
+            'OBV_Signal': lambda: labels('OBV_Signal', 'Buy', 'Sell'),
+            'BB_Signal': lambda: labels('BB_Signal', 'Buy', 'Sell'),
+            'ADX_Signal': lambda: labels('ADX_Signal', 'Buy', 'Sell'),
+            'SR_Zone': lambda: labels('SR_Zone', 'Support', 'Resistance'),
+        }
+        return np.column_stack([encoders[name]() for _, name in self.SCORED_SIGNALS]) if n else \
+            np.zeros((0, len(self.SCORED_SIGNALS)), dtype=np.int8)
+
+    def weight_matrix(self) -> np.ndarray:
+        """
+        مصفوفة الأوزان: صفوف = [شراء لكل إشارة ..., بيع لكل إشارة ...]،
+        أعمدة = أعمدة الدرجات الفرعية (score_columns) ثم AGGREGATE_COLUMNS.
+        """
+        score_cols = self.score_columns
+        k = len(self.SCORED_SIGNALS)
+        W = np.zeros((2 * k, len(score_cols)))
+        for i, (category, name) in enumerate(self.SCORED_SIGNALS):
+            prefix = self.CATEGORY_PREFIX[category]
+            weight = self.base_weights[category][name]
+            W[i, score_cols.index(f'{prefix}_buy_score')] = weight
+            W[k + i, score_cols.index(f'{prefix}_sell_score')] = weight
+
+        # تجميع الدرجات الفرعية إلى Buy/Sell/Net و Important_*
+        A = np.zeros((len(score_cols), len(self.AGGREGATE_COLUMNS)))
+        for j, col in enumerate(score_cols):
+            prefix, side = col.rsplit('_', 2)[0], col.rsplit('_', 2)[1]
+            important = prefix in self.IMPORTANT_CATEGORIES
+            if side == 'buy':
+                A[j, 0], A[j, 2] = 1, 1
+                if important:
+                    A[j, 3], A[j, 5] = 1, 1
+            else:
+                A[j, 1], A[j, 2] = 1, -1
+                if important:
+                    A[j, 4], A[j, 5] = 1, -1
+        return np.hstack([W, W @ A])
+
+    def score_states(self, states: np.ndarray) -> np.ndarray:
+        """حساب كل الدرجات بضرب مصفوفة واحد (يصلح لدمج صفوف عدة أسهم)."""
+        indicator = np.hstack([states > 0, states < 0]).astype(float)
+        # التقريب يزيل بواقي الفاصلة العائمة (مثلاً Net = 4e-16 بدل 0) حتى لا تنقلب Hold إلى Buy/Sell
+        return np.round(indicator @ self.weight_matrix(), 10) + 0.0
+
     def vectorized_signal_calculation(self, df: pd.DataFrame) -> pd.DataFrame:
-        # Normalize signal columns
+        compact = self.config.compact_signals
+
+        def emit(col, codes):
+            df[col] = codes if compact else decode_signal(codes, col)
+
+        # Normalize signal columns (الأعمدة المرمّزة int8 لا تحتاج تطبيع)
         for col in ['MACD_Trade_Signal', 'OBV_Signal', 'BB_Signal', 'Stoch_Signal', 'ADX_Signal']:
-            if col in df.columns:
+            if col in df.columns and not is_coded(df[col]):
                 df[col] = df[col].astype(str).str.strip().str.capitalize()
 
         # Compute SMAs
@@ -70,82 +190,24 @@ class AdaptiveTechnicalSignalAnalyzer:
         df['SMA_50'] = df['Close'].rolling(window=50).mean()
 
         # Position vs SMAs
-        df['Position_vs_SMA20'] = np.where(df['Close'] > df['SMA_20'], 'Above', 'Below')
-        df['Position_vs_SMA50'] = np.where(df['Close'] > df['SMA_50'], 'Above', 'Below')
-
-        # Initialize score columns
-        sc_cols = ['trend_buy_score', 'trend_sell_score',
-                   'momentum_buy_score', 'momentum_sell_score',
-                   'volume_buy_score', 'volume_sell_score',
-                   'volatility_buy_score', 'volatility_sell_score',
-                   'strength_buy_score', 'strength_sell_score',
-                   'sr_buy_score', 'sr_sell_score']
-        for sc in sc_cols:
-            df[sc] = 0.0
+        above_20 = (df['Close'] > df['SMA_20']).to_numpy()
+        above_50 = (df['Close'] > df['SMA_50']).to_numpy()
+        emit('Position_vs_SMA20', signal_code(above_20, ~above_20))
+        emit('Position_vs_SMA50', signal_code(above_50, ~above_50))
 
         # Support/Resistance zone
         if all(c in df.columns for c in ['Close','S1','R1']):
-            def sr_zone(r):
-                price, s1, r1 = r['Close'], r['S1'], r['R1']
-                if price >= r1 * 0.995: return 'Resistance'
-                if price <= s1 * 1.005: return 'Support'
-                return 'None'
-            df['SR_Zone'] = df.apply(sr_zone, axis=1)
+            emit('SR_Zone', sr_zone_code(df['Close'].to_numpy(), df['S1'].to_numpy(), df['R1'].to_numpy()))
         else:
-            df['SR_Zone'] = 'None'
-        df.loc[df['SR_Zone']=='Support','sr_buy_score'] += self.base_weights['support_resistance']['SR_Zone']
-        df.loc[df['SR_Zone']=='Resistance','sr_sell_score'] += self.base_weights['support_resistance']['SR_Zone']
-
-        # Trend scoring (position and EMA)
-        df.loc[df['Position_vs_SMA20']=='Above','trend_buy_score'] += self.base_weights['trend_indicators']['Position_vs_SMA20']
-        df.loc[df['Position_vs_SMA20']=='Below','trend_sell_score'] += self.base_weights['trend_indicators']['Position_vs_SMA20']
-        df.loc[df['Position_vs_SMA50']=='Above','trend_buy_score'] += self.base_weights['trend_indicators']['Position_vs_SMA50']
-        df.loc[df['Position_vs_SMA50']=='Below','trend_sell_score'] += self.base_weights['trend_indicators']['Position_vs_SMA50']
-        if 'EMA_signal' in df.columns:
-            df.loc[df['EMA_signal']=='Golden Cross','trend_buy_score'] += self.base_weights['trend_indicators']['EMA_signal']
-            df.loc[df['EMA_signal']=='Death Cross','trend_sell_score'] += self.base_weights['trend_indicators']['EMA_signal']
-
-        # Momentum scoring
+            emit('SR_Zone', np.zeros(len(df), dtype=np.int8))
         if 'RSI' in df.columns:
-            df['RSI_Signal'] = np.where(df['RSI']<30,'Buy',np.where(df['RSI']>70,'Sell','Hold'))
-            df.loc[df['RSI_Signal']=='Buy','momentum_buy_score'] += self.base_weights['momentum_indicators']['RSI_Signal']
-            df.loc[df['RSI_Signal']=='Sell','momentum_sell_score'] += self.base_weights['momentum_indicators']['RSI_Signal']
-        df.loc[df['MACD_Histogram']>0,'momentum_buy_score'] += self.base_weights['momentum_indicators']['MACD_Histogram']
-        df.loc[df['MACD_Histogram']<0,'momentum_sell_score'] += self.base_weights['momentum_indicators']['MACD_Histogram']
-        if 'Stoch_Signal' in df.columns:
-            df.loc[df['Stoch_Signal']=='Buy','momentum_buy_score'] += self.base_weights['momentum_indicators']['Stoch_Signal']
-            df.loc[df['Stoch_Signal']=='Sell','momentum_sell_score'] += self.base_weights['momentum_indicators']['Stoch_Signal']
-
-        # Volume scoring
-        if 'OBV_Signal' in df.columns:
-            df.loc[df['OBV_Signal']=='Buy','volume_buy_score'] += self.base_weights['volume_indicators']['OBV_Signal']
-            df.loc[df['OBV_Signal']=='Sell','volume_sell_score'] += self.base_weights['volume_indicators']['OBV_Signal']
-
-        # Volatility scoring
-        if 'BB_Signal' in df.columns:
-            df.loc[df['BB_Signal']=='Buy','volatility_buy_score'] += self.base_weights['volatility_indicators']['BB_Signal']
-            df.loc[df['BB_Signal']=='Sell','volatility_sell_score'] += self.base_weights['volatility_indicators']['BB_Signal']
-
-        # Strength scoring
-        if 'ADX_Signal' in df.columns:
-            df.loc[df['ADX_Signal']=='Buy','strength_buy_score'] += self.base_weights['strength_indicators']['ADX_Signal']
-            df.loc[df['ADX_Signal']=='Sell','strength_sell_score'] += self.base_weights['strength_indicators']['ADX_Signal']
-
-        # Aggregate scores
-        df['Buy_Score'] = df.filter(like='_buy_score').sum(axis=1)
-        df['Sell_Score'] = df.filter(like='_sell_score').sum(axis=1)
-        df['Net_Score'] = df['Buy_Score'] - df['Sell_Score']
-
-        # Important aggregate
-        buy_cols = ['trend_buy_score','momentum_buy_score','volume_buy_score','strength_buy_score','sr_buy_score']
-        sell_cols= ['trend_sell_score','momentum_sell_score','volume_sell_score','strength_sell_score','sr_sell_score']
-        for col in buy_cols+sell_cols:
-            if col not in df.columns:
-                df[col] = 0.0
-        df['Important_Buy_Score'] = df[buy_cols].sum(axis=1)
-        df['Important_Sell_Score']= df[sell_cols].sum(axis=1)
-        df['Important_Net_Score'] = df['Important_Buy_Score'] - df['Important_Sell_Score']
-        df['Important_Signal']    = np.where(df['Important_Net_Score']>0,'Buy',np.where(df['Important_Net_Score']<0,'Sell','Hold'))
+            emit('RSI_Signal', signal_code(df['RSI'] < 30, df['RSI'] > 70))
+
+        # All scores from one matrix product
+        scores = self.score_states(self.encode_signal_states(df))
+        for j, col in enumerate(self.score_columns + self.AGGREGATE_COLUMNS):
+            df[col] = scores[:, j]
+        emit('Important_Signal', signal_code(df['Important_Net_Score'] > 0, df['Important_Net_Score'] < 0))
 
         return df
 
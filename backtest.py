@@ -0,0 +1,374 @@
+# backtest.py
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from compute_indicators import FIB_RATIOS, compute_indicators, compute_rolling_levels
+from analyze_signals import AdaptiveTechnicalSignalAnalyzer, SignalConfig
+from price_targets import calculate_price_targets_batch
+from signal_codes import signal_code
+
+BUY_DECISIONS = ('Strong Buy', 'Buy')
+SELL_DECISIONS = ('Strong Sell', 'Sell')
+SR_TOP = 3
+
+
+def _tail_mean(values: np.ndarray, window: int = 30) -> np.ndarray:
+    """متوسط آخر window قيمة لكل صف (نفس tail(window).mean() في analyze_data)."""
+    n = len(values)
+    out = np.full(n, np.nan)
+    for i in range(min(window - 1, n)):
+        out[i] = values[:i + 1].mean()
+    if n >= window:
+        out[window - 1:] = np.lib.stride_tricks.sliding_window_view(values, window).mean(axis=1)
+    return out
+
+
+def _pick(candidates: np.ndarray, valid: np.ndarray, reduce, fallback: np.ndarray) -> np.ndarray:
+    """min/max لكل صف على المرشحين الصالحين فقط، وإلا fallback."""
+    fill = np.inf if reduce is np.min else -np.inf
+    picked = reduce(np.where(valid, candidates, fill), axis=1)
+    return np.where(valid.any(axis=1), picked, fallback)
+
+
+def prepare_history(technical_data: pd.DataFrame) -> pd.DataFrame:
+    """
+    المؤشرات والإشارات لكل صف كما يراها analyze_data لو استُدعيت في ذلك التاريخ:
+    مستويات Swing/Fibonacci/SR Zones متحركة (compute_rolling_levels) بدل قيم الإطار كاملاً.
+    """
+    data = compute_indicators(technical_data, compact=True)
+    # نفس صفوف dropna في calculate_technical_indicators (Long_* هناك ثابتة غير فارغة)
+    complete = data.drop(columns=['Long_Resistance', 'Long_Support']).notna().all(axis=1)
+    levels = compute_rolling_levels(data, sr_top=SR_TOP)
+    for col in levels.columns:
+        data[col] = levels[col]
+    data = data[complete].reset_index(drop=True)
+
+    analyzer = AdaptiveTechnicalSignalAnalyzer(SignalConfig(enable_logging=False, compact_signals=True))
+    data = analyzer.vectorized_signal_calculation(data)
+    data['Signal'] = signal_code(data['Net_Score'] > 0, data['Net_Score'] < 0)
+    return data
+
+
+def replay_decisions(data: pd.DataFrame, financial_analysis: Dict, min_rows: int = 10) -> pd.DataFrame:
+    """
+    إعادة تشغيل منطق analyze_data (التوقع، القرار، الدخول/الخروج/وقف الخسارة)
+    على كل صف من prepare_history دفعة واحدة.
+
+    - financial_analysis: نتيجة analyze_financial_performance (ثابتة عبر الزمن)
+    - min_rows: الصفوف قبل هذا العدد لا قرار لها (analyze_data ترفض أقل من 10 أيام)
+
+    Returns: DataFrame بنفس صفوف data مع أعمدة القرار والمستويات لكل اتجاه
+    (long_* للشراء و short_* للبيع) وأعمدة entry_point/exit_point/stop_loss حسب القرار.
+    """
+    n = len(data)
+    close = data['Close'].to_numpy(dtype=float)
+    support = data['Low'].rolling(20, min_periods=1).min().to_numpy()
+    resistance = data['High'].rolling(20, min_periods=1).max().to_numpy()
+    volatility = (data['Close'].pct_change().expanding().std() * 100).to_numpy()
+    avg_net = _tail_mean(data['Important_Net_Score'].to_numpy(dtype=float))
+    rsi = data['RSI_14'].to_numpy(dtype=float)
+
+    # ----- التوقع (نفس شروط analyze_data) -----
+    overall = np.full(n, financial_analysis.get('overall_score', 0), dtype=float)
+    prediction = np.select(
+        [(avg_net > 2) & (overall >= 70), (avg_net > 0) & (overall >= 50),
+         (avg_net < -2) & (overall < 40), (avg_net < 0) & (overall < 50)],
+        ['Strong Uptrend', 'Possible Uptrend', 'Strong Downtrend', 'Possible Downtrend'],
+        'Sideways Movement'
+    )
+
+    # ----- القرار (نفس make_investment_decision) -----
+    score = np.select([overall >= 80, overall >= 70, overall >= 60, overall >= 40], [4, 3, 2, 1], -2) + 0.0
+    score = score + np.select(
+        [avg_net >= 3, avg_net >= 1.5, avg_net >= 0.5, avg_net <= -3, avg_net <= -1.5, avg_net <= -0.5],
+        [3, 2, 1, -3, -2, -1], 0
+    )
+    score = score + np.select([volatility > 5, volatility < 2], [-0.5, 0.5], 0)
+    score = score + np.select([rsi <= 30, rsi >= 70], [0.5, -0.5], 0)
+    decision = np.select([score >= 4, score >= 2, score >= -1, score >= -3],
+                         ['Strong Buy', 'Buy', 'Hold', 'Sell'], 'Strong Sell')
+
+    # ----- المستويات -----
+    fib = {name: data[name].to_numpy(dtype=float) for name in FIB_RATIOS}
+    zone_low = np.column_stack([data[f'SR_Zone_{k + 1}_Low'].to_numpy() for k in range(SR_TOP)])
+    zone_high = np.column_stack([data[f'SR_Zone_{k + 1}_High'].to_numpy() for k in range(SR_TOP)])
+    long_res = data['Long_Resistance'].to_numpy(dtype=float)
+    long_sup = data['Long_Support'].to_numpy(dtype=float)
+    bb_upper = data['BB_Upper'].to_numpy(dtype=float)
+    bb_lower = data['BB_Lower'].to_numpy(dtype=float)
+    pivots = {k: data[k].to_numpy(dtype=float) for k in ('R1', 'R2', 'S1', 'S2')}
+    price = close[:, None]
+
+    # أهداف السعر (up_targets[1] / down_targets[1]) لكل الصفوف دفعة واحدة
+    up_targets, down_targets = calculate_price_targets_batch(
+        current_price=close,
+        volatility=volatility,
+        bb_upper=bb_upper,
+        bb_lower=bb_lower,
+        resistance=resistance,
+        support=support,
+        short_resistance=pivots['R1'],
+        long_resistance=long_res,
+        short_support=pivots['S1'],
+        long_support=long_sup,
+        fib_levels=fib,
+        pivot_levels=pivots,
+        trend_prediction=prediction,
+    )
+    up_2, down_2 = up_targets[:, 1], down_targets[:, 1]
+
+    # الدخول للشراء: أعلى دعم صالح، وللبيع: أدنى مقاومة صالحة
+    zone_sup = np.min(np.where(price > zone_high, zone_low, np.inf), axis=1)
+    zone_sup = np.where(np.isinf(zone_sup), support, zone_sup)
+    buy_entry = np.column_stack([support, fib['Fib_61.8'], zone_sup, long_sup, bb_lower])
+    long_entry = np.round(_pick(buy_entry, buy_entry > 0, np.max, close), 2)
+
+    zone_res = np.max(np.where(price < zone_low, zone_high, -np.inf), axis=1)
+    zone_res = np.where(np.isinf(zone_res), resistance, zone_res)
+    sell_entry = np.column_stack([resistance, fib['Fib_38.2'], zone_res, long_res, bb_upper])
+    short_entry = np.round(_pick(sell_entry, sell_entry > 0, np.min, close), 2)
+
+    # الخروج: أقرب هدف بعد نقطة الدخول
+    zone_up = np.max(np.where(zone_high > price, zone_high, -np.inf), axis=1)
+    zone_up = np.where(np.isinf(zone_up), resistance, zone_up)
+    long_exits = np.column_stack([up_2, resistance, fib['Fib_23.6'], long_res, bb_upper, zone_up])
+    long_exit = np.round(_pick(long_exits, long_exits > long_entry[:, None], np.min, close * 1.05), 2)
+
+    zone_down = np.min(np.where(zone_low < price, zone_low, np.inf), axis=1)
+    zone_down = np.where(np.isinf(zone_down), support, zone_down)
+    short_exits = np.column_stack([down_2, support, fib['Fib_78.6'], long_sup, bb_lower, zone_down])
+    short_exit = np.round(_pick(short_exits, short_exits < short_entry[:, None], np.max, close * 0.95), 2)
+
+    long_stop = np.round(long_entry * 0.95, 2)
+    short_stop = np.round(short_entry * 1.05, 2)
+
+    is_buy = np.isin(decision, BUY_DECISIONS)
+    is_sell = np.isin(decision, SELL_DECISIONS)
+    decision = np.where(np.arange(n) < min_rows - 1, None, decision)
+
+    result = pd.DataFrame({
+        'Date': data['Date'] if 'Date' in data.columns else data.index,
+        'Close': close,
+        'Signal': data['Signal'].to_numpy(),
+        'Important_Signal': data['Important_Signal'].to_numpy(),
+        'avg_net_score': avg_net,
+        'volatility': volatility,
+        'prediction': prediction,
+        'decision': decision,
+        'decision_score': score,
+        'long_entry': long_entry,
+        'long_exit': long_exit,
+        'long_stop': long_stop,
+        'short_entry': short_entry,
+        'short_exit': short_exit,
+        'short_stop': short_stop,
+    })
+    result['entry_point'] = np.where(is_sell, short_entry, long_entry)
+    result['exit_point'] = np.where(is_buy, long_exit, np.where(is_sell, short_exit, np.round(close, 2)))
+    result['stop_loss'] = np.where(is_sell, short_stop, long_stop)
+    return result
+
+
+def simulate_trades(
+    history: pd.DataFrame,
+    decisions: pd.DataFrame,
+    signal_column: str = 'decision',
+    entry_window: int = 5,
+    max_hold: int = 20,
+    investment_amount: float = 10000,
+    commission: float = 0.0,
+) -> pd.DataFrame:
+    """
+    محاكاة الصفقات من إشارات الصف t باستخدام أسعار الصفوف اللاحقة فقط.
+
+    - signal_column: 'decision' (Buy/Strong Buy شراء، Sell/Strong Sell بيع)
+      أو 'Signal' / 'Important_Signal' (رموز int8)
+    - entry_window: أمر محدد عند نقطة الدخول صالح لهذا العدد من الشموع التالية
+    - max_hold: أقصى عدد شموع للصفقة ثم الخروج بسعر الإغلاق
+    - commission: نسبة العمولة لكل جهة
+
+    وقف الخسارة يُحسب من سعر التنفيذ الفعلي بنفس نسبة القرار (stop / entry)، لأن
+    التنفيذ قد يتم بسعر افتتاح أفضل من نقطة الدخول (فجوة سعرية). الهدف مستوى سعري
+    يبقى في جهة الربح دائماً. الوقف والهدف يُفحصان من شمعة التنفيذ نفسها.
+    عند لمس الهدف ووقف الخسارة في نفس الشمعة يُفترض وقف الخسارة (تقدير متحفظ).
+    صفقة واحدة مفتوحة في كل وقت؛ الإشارات أثناء صفقة مفتوحة تُتجاهل.
+    """
+    n = len(history)
+    if signal_column == 'decision':
+        side = np.where(decisions['decision'].isin(BUY_DECISIONS), 1,
+                        np.where(decisions['decision'].isin(SELL_DECISIONS), -1, 0))
+    else:
+        side = decisions[signal_column].to_numpy(dtype=np.int8).astype(int)
+        side[decisions['decision'].isna().to_numpy()] = 0
+    signal_rows = np.flatnonzero(side[:-1]) if n else np.array([], dtype=int)
+    columns = ['signal_date', 'side', 'entry_date', 'entry_price', 'stop_price', 'target_price',
+               'exit_date', 'exit_price', 'exit_reason', 'bars_held', 'shares', 'pnl', 'return_pct']
+    if len(signal_rows) == 0:
+        return pd.DataFrame(columns=columns)
+
+    close = history['Close'].to_numpy(dtype=float)
+    high = history['High'].to_numpy(dtype=float)
+    low = history['Low'].to_numpy(dtype=float)
+    open_ = history['Open'].to_numpy(dtype=float) if 'Open' in history.columns else close
+    pad = np.full(entry_window + max_hold + 1, np.nan)
+    high_p, low_p, open_p = (np.concatenate([a, pad]) for a in (high, low, open_))
+
+    t = signal_rows
+    s = side[t]
+    entry = np.where(s > 0, decisions['long_entry'].to_numpy()[t], decisions['short_entry'].to_numpy()[t])
+    target = np.where(s > 0, decisions['long_exit'].to_numpy()[t], decisions['short_exit'].to_numpy()[t])
+    stop = np.where(s > 0, decisions['long_stop'].to_numpy()[t], decisions['short_stop'].to_numpy()[t])
+
+    # ----- التنفيذ: أول شمعة يصل فيها السعر لنقطة الدخول -----
+    rows = t[:, None] + 1 + np.arange(entry_window)
+    touched = np.where(s[:, None] > 0, low_p[rows] <= entry[:, None], high_p[rows] >= entry[:, None])
+    filled = touched.any(axis=1)
+    fill_bar = t + 1 + touched.argmax(axis=1)
+    fill_open = open_p[fill_bar]
+    fill_price = np.where(s > 0, np.fmin(fill_open, entry), np.fmax(fill_open, entry))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        stop = np.round(fill_price * (stop / entry), 2)
+
+    # ----- الخروج: هدف / وقف خسارة / انتهاء المدة (بدءاً من شمعة التنفيذ) -----
+    rows = fill_bar[:, None] + np.arange(max_hold + 1)
+    long_side = s[:, None] > 0
+    stop_hit = np.where(long_side, low_p[rows] <= stop[:, None], high_p[rows] >= stop[:, None])
+    target_hit = np.where(long_side, high_p[rows] >= target[:, None], low_p[rows] <= target[:, None])
+    no_hit = max_hold + 1
+    first_stop = np.where(stop_hit.any(axis=1), stop_hit.argmax(axis=1), no_hit)
+    first_target = np.where(target_hit.any(axis=1), target_hit.argmax(axis=1), no_hit)
+    by_stop = (first_stop <= first_target) & (first_stop < no_hit)
+    by_target = (first_target < first_stop)
+    exit_bar = fill_bar + np.minimum(first_stop, first_target)
+    timeout_bar = np.minimum(fill_bar + max_hold, n - 1)
+    exit_bar = np.where(by_stop | by_target, exit_bar, timeout_bar)
+    # في شمعة التنفيذ الافتتاح سبق الدخول، فالخروج عند المستوى نفسه
+    exit_open = np.where(exit_bar == fill_bar, np.nan, open_p[exit_bar])
+    exit_price = np.select(
+        [by_stop & (s > 0), by_stop, by_target & (s > 0), by_target],
+        [np.fmin(exit_open, stop), np.fmax(exit_open, stop),
+         np.fmax(exit_open, target), np.fmin(exit_open, target)],
+        close[exit_bar]
+    )
+    exit_reason = np.select([by_stop, by_target, fill_bar + max_hold <= n - 1],
+                            ['stop_loss', 'target', 'timeout'], 'end_of_data')
+
+    # ----- صفقة واحدة في كل وقت -----
+    taken = np.zeros(len(t), dtype=bool)
+    busy_until = -1
+    for i in np.flatnonzero(filled & (fill_bar < n)):
+        if t[i] >= busy_until:
+            taken[i] = True
+            busy_until = exit_bar[i]
+
+    t, s, fill_bar, fill_price, stop, target, exit_bar, exit_price, exit_reason = (
+        a[taken] for a in (t, s, fill_bar, fill_price, stop, target, exit_bar, exit_price, exit_reason)
+    )
+    shares = np.floor(investment_amount / fill_price).astype(int)
+    pnl = s * (exit_price - fill_price) * shares - commission * (fill_price + exit_price) * shares
+    dates = decisions['Date'].to_numpy()
+    return pd.DataFrame({
+        'signal_date': dates[t],
+        'side': np.where(s > 0, 'Long', 'Short'),
+        'entry_date': dates[fill_bar],
+        'entry_price': fill_price,
+        'stop_price': stop,
+        'target_price': target,
+        'exit_date': dates[exit_bar],
+        'exit_price': exit_price,
+        'exit_reason': exit_reason,
+        'bars_held': exit_bar - fill_bar,
+        'shares': shares,
+        'pnl': pnl,
+        'return_pct': (s * (exit_price - fill_price) - commission * (fill_price + exit_price)) / fill_price * 100,
+    }, columns=columns)
+
+
+def summarize_trades(trades: pd.DataFrame, investment_amount: float = 10000) -> Dict:
+    """الإحصاءات: عدد الصفقات، نسبة النجاح، الربح، وأقصى تراجع لمنحنى رأس المال."""
+    pnl = trades['pnl'].to_numpy(dtype=float)
+    wins, losses = pnl[pnl > 0], pnl[pnl < 0]
+    equity = investment_amount + np.concatenate(([0.0], np.cumsum(pnl)))
+    peak = np.maximum.accumulate(equity)
+    drawdown = (equity - peak) / peak * 100
+    return {
+        'trades': len(pnl),
+        'wins': len(wins),
+        'losses': len(losses),
+        'hit_rate': len(wins) / len(pnl) * 100 if len(pnl) else np.nan,
+        'total_pnl': pnl.sum(),
+        'avg_return_pct': trades['return_pct'].mean() if len(pnl) else np.nan,
+        'avg_win': wins.mean() if len(wins) else np.nan,
+        'avg_loss': losses.mean() if len(losses) else np.nan,
+        'profit_factor': wins.sum() / -losses.sum() if len(losses) else np.nan,
+        'max_drawdown_pct': drawdown.min(),
+        'exit_reasons': trades['exit_reason'].value_counts().to_dict(),
+    }
+
+
+def backtest_symbol(
+    technical_data: pd.DataFrame,
+    financial_analysis: Dict,
+    investment_amount: float = 10000,
+    signal_column: str = 'decision',
+    entry_window: int = 5,
+    max_hold: int = 20,
+    commission: float = 0.0,
+) -> Dict:
+    """
+    اختبار تاريخي لسهم واحد بدون look-ahead.
+
+    Returns: dict فيه 'decisions' (قرار ومستويات كل صف)، 'trades'، 'summary'
+    """
+    history = prepare_history(technical_data)
+    decisions = replay_decisions(history, financial_analysis)
+    trades = simulate_trades(history, decisions, signal_column, entry_window, max_hold,
+                             investment_amount, commission)
+    return {
+        'decisions': decisions,
+        'trades': trades,
+        'summary': summarize_trades(trades, investment_amount),
+    }
+
+
+def _backtest_worker(symbol, technical_data, financial_analysis, kwargs):
+    """يعمل داخل العملية الفرعية ويعيد (symbol, result, error) بدل رفع الاستثناء."""
+    try:
+        result = backtest_symbol(technical_data, financial_analysis, **kwargs)
+        result.pop('decisions')
+        return symbol, result, None
+    except Exception as e:
+        return symbol, None, str(e)
+
+
+def backtest_universe(
+    items: Dict[str, Tuple[pd.DataFrame, Dict]],
+    max_workers: Optional[int] = None,
+    **kwargs,
+) -> Tuple[Dict[str, Dict], Dict[str, str]]:
+    """
+    تشغيل backtest_symbol لعدة أسهم على ProcessPoolExecutor.
+
+    - items: dict symbol -> (technical_data, financial_analysis)
+    - kwargs: تمرر إلى backtest_symbol (investment_amount, signal_column, ...)
+
+    Returns:
+    - results: dict symbol -> {'trades', 'summary'}
+    - errors: dict symbol -> رسالة الخطأ
+    """
+    results, errors = {}, {}
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = [
+            pool.submit(_backtest_worker, symbol, technical_data, financial_analysis, kwargs)
+            for symbol, (technical_data, financial_analysis) in items.items()
+        ]
+        for future in futures:
+            symbol, result, error = future.result()
+            if error is None:
+                results[symbol] = result
+            else:
+                errors[symbol] = error
+    return results, errors
@@ -0,0 +1,42 @@
+# benchmark_signals.py
+import time
+import numpy as np
+import pandas as pd
+
+from analyze_signals import classify_sr_zone
+
+
+def _sr_zone_apply(df: pd.DataFrame) -> pd.Series:
+    """التطبيق القديم صفاً بصف (للمقارنة فقط)."""
+    def sr_zone(r):
+        price, s1, r1 = r['Close'], r['S1'], r['R1']
+        if price >= r1 * 0.995: return 'Resistance'
+        if price <= s1 * 1.005: return 'Support'
+        return 'None'
+    return df.apply(sr_zone, axis=1)
+
+
+def _make_frame(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    high = close + rng.random(n) * 2
+    low = close - rng.random(n) * 2
+    pivot = (high + low + close) / 3
+    return pd.DataFrame({'Close': close, 'S1': 2 * pivot - high, 'R1': 2 * pivot - low})
+
+
+def benchmark_sr_zone(sizes=(10_000, 100_000, 1_000_000)):
+    """مقارنة df.apply مع التصنيف المتجه لـ SR_Zone على أحجام مختلفة."""
+    for n in sizes:
+        df = _make_frame(n)
+        t0 = time.perf_counter()
+        old = _sr_zone_apply(df)
+        t1 = time.perf_counter()
+        new = classify_sr_zone(df['Close'].to_numpy(), df['S1'].to_numpy(), df['R1'].to_numpy())
+        t2 = time.perf_counter()
+        assert (old.to_numpy() == new).all()
+        print(f"{n:>9} rows | apply: {t1 - t0:8.3f}s | vectorized: {t2 - t1:8.4f}s | x{(t1 - t0) / (t2 - t1):,.0f}")
+
+
+if __name__ == '__main__':
+    benchmark_sr_zone()
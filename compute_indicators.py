@@ -1,6 +1,10 @@
 import pandas as pd
 import numpy as np
-from scipy.signal import find_peaks
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Tuple
+from scipy.signal import find_peaks, lfilter
+
+from signal_codes import SIGNAL_LABELS, decode_signal, signal_code
 
 
 def compute_rsi_wilder(series: pd.Series, period: int = 14) -> pd.Series:
@@ -23,6 +27,50 @@ def compute_rsi_wilder(series: pd.Series, period: int = 14) -> pd.Series:
     return rsi
 
 
+def _ewm_grid(values: np.ndarray, alphas: Iterable[float]) -> np.ndarray:
+    """
+    EWM (adjust=False) لعدة قيم alpha على نفس السلسلة: عمود لكل alpha.
+    كل عمود مرشّح IIR من الدرجة الأولى (lfilter) يبدأ من القيمة الأولى.
+    """
+    values = np.asarray(values, dtype=float)
+    out = np.empty((len(values), len(alphas)))
+    if len(values) == 0:
+        return out
+    for j, alpha in enumerate(alphas):
+        out[:, j], _ = lfilter([alpha], [1.0, alpha - 1.0], values, zi=[(1.0 - alpha) * values[0]])
+    return out
+
+
+def compute_rsi_wilder_grid(series: pd.Series, periods: Iterable[int]) -> pd.DataFrame:
+    """
+    حساب RSI (Wilder) لعدة فترات دفعة واحدة مع diff مشترك.
+    Returns: DataFrame بعمود لكل فترة (نفس قيم compute_rsi_wilder ضمن دقة الفاصلة العائمة).
+    السلسلة يجب أن تكون بدون NaN (كما تعيدها fetch_technical_data).
+    """
+    periods = list(periods)
+    delta = series.diff().to_numpy(dtype=float)
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
+    alphas = [1 / p for p in periods]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = _ewm_grid(gain, alphas) / _ewm_grid(loss, alphas)
+        rsi = 100 - (100 / (1 + rs))
+    # min_periods=period: أول قيمة صالحة عند الصف period-1
+    rows = np.arange(len(series))[:, None]
+    rsi[rows < np.array(periods)[None, :] - 1] = np.nan
+    return pd.DataFrame(rsi, index=series.index, columns=periods)
+
+
+def compute_ema_grid(series: pd.Series, spans: Iterable[int]) -> pd.DataFrame:
+    """
+    حساب EMA (adjust=False) لعدة فترات span دفعة واحدة.
+    Returns: DataFrame بعمود لكل span. السلسلة يجب أن تكون بدون NaN.
+    """
+    spans = list(spans)
+    ema = _ewm_grid(series.to_numpy(dtype=float), [2 / (span + 1) for span in spans])
+    return pd.DataFrame(ema, index=series.index, columns=spans)
+
+
 def detect_swing_levels(price_series: pd.Series, order: int = 5):
     """
     يكتشف Swing Highs و Swing Lows في سلسلة الأسعار.
@@ -38,136 +86,524 @@ def detect_swing_levels(price_series: pd.Series, order: int = 5):
     return swing_highs, swing_lows
 
 
-def calculate_adx(df: pd.DataFrame, period: int = 14) -> pd.Series:
+def _select_by_distance(positions: np.ndarray, values: np.ndarray, distance: int) -> np.ndarray:
     """
-    حساب مؤشر قوة الاتجاه (ADX)
+    نفس قاعدة distance في find_peaks: الأعلى أولاً يحذف جيرانه الأقرب من distance.
+    """
+    keep = np.ones(len(positions), dtype=bool)
+    for j in np.argsort(values, kind='stable')[::-1]:
+        if not keep[j]:
+            continue
+        near = np.abs(positions - positions[j]) < distance
+        near[j] = False
+        keep[near] = False
+    return keep
+
+
+class _PeakStream:
+    """قمم محلية (بنفس تعريف find_peaks للهضاب) تُؤكَّد شمعةً بشمعة."""
+
+    def __init__(self, distance: int):
+        self.distance = distance
+        self.n = 0
+        self.prev = np.nan
+        self.left = None              # بداية صعود/هضبة لم تُحسم بعد
+        self.kept_positions = []      # قمم نهائية (مجموعات مغلقة)
+        self.kept_values = []
+        self.open_positions = []      # آخر مجموعة قمم متقاربة (< distance) قد تتأثر بالقادم
+        self.open_values = []
+        self.extreme = np.nan         # أعلى قمة مؤكدة (لا يحذفها شرط distance أبداً)
+
+    def push(self, x: float):
+        i = self.n
+        if self.left is not None:
+            plateau = self.prev
+            if x < plateau:
+                self._confirm((self.left + i - 1) // 2, plateau)
+                self.left = None
+            elif x != plateau:
+                self.left = None
+        if self.left is None and self.prev < x:
+            self.left = i
+        self.prev = x
+        self.n += 1
+
+    def _confirm(self, position: int, value: float):
+        if self.open_positions and position - self.open_positions[-1] >= self.distance:
+            self._close_group()
+        self.open_positions.append(position)
+        self.open_values.append(value)
+        if not value <= self.extreme:
+            self.extreme = value
+
+    def _close_group(self):
+        positions = np.array(self.open_positions)
+        values = np.array(self.open_values)
+        keep = _select_by_distance(positions, values, self.distance)
+        self.kept_positions.extend(positions[keep].tolist())
+        self.kept_values.extend(values[keep].tolist())
+        self.open_positions, self.open_values = [], []
+
+    def peaks(self) -> Tuple[np.ndarray, np.ndarray]:
+        positions = np.array(self.kept_positions + self.open_positions, dtype=np.int64)
+        values = np.array(self.kept_values + self.open_values, dtype=float)
+        if self.open_positions:
+            start = len(self.kept_positions)
+            keep = np.ones(len(positions), dtype=bool)
+            keep[start:] = _select_by_distance(positions[start:], values[start:], self.distance)
+            positions, values = positions[keep], values[keep]
+        return positions, values
+
+
+class SwingDetector:
+    """
+    كشف Swing Highs/Lows تدريجياً: كل شمعة جديدة تُفحص مقابل الهضبة الجارية وآخر
+    مجموعة قمم متقاربة فقط (ضمن order شمعة)، بدل إعادة find_peaks على السجل كاملاً.
+
+    النتائج مطابقة لـ detect_swing_levels على نفس السلسلة، باستثناء الاختيار بين قمتين
+    متساويتين ضمن order شمعة (ترتيبه غير محدد في find_peaks).
+    القمة تُؤكَّد عند وصول أول إغلاق أدنى منها (والقاع عند أول إغلاق أعلى).
+    """
+
+    def __init__(self, order: int = 5):
+        self.order = order
+        self._highs = _PeakStream(order)
+        self._lows = _PeakStream(order)
+
+    def __len__(self) -> int:
+        return self._highs.n
+
+    def append(self, price: float):
+        price = float(price)
+        self._highs.push(price)
+        self._lows.push(-price)
+
+    def extend(self, prices: Iterable[float]):
+        for price in np.asarray(prices, dtype=float):
+            self.append(price)
+
+    @property
+    def swing_highs(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(مواقع الشموع، الأسعار) كمصفوفات NumPy."""
+        return self._highs.peaks()
+
+    @property
+    def swing_lows(self) -> Tuple[np.ndarray, np.ndarray]:
+        positions, values = self._lows.peaks()
+        return positions, -values
+
+    @property
+    def long_resistance(self) -> float:
+        """أعلى Swing High حتى الآن (مثل عمود Long_Resistance)."""
+        return self._highs.extreme
+
+    @property
+    def long_support(self) -> float:
+        """أدنى Swing Low حتى الآن (مثل عمود Long_Support)."""
+        return -self._lows.extreme
+
+
+def compute_obv(close: pd.Series, volume: pd.Series) -> pd.Series:
+    """
+    حساب On-Balance Volume كمجموع تراكمي للحجم الموقّع بإشارة تغير الإغلاق.
+    """
+    c = close.to_numpy()
+    v = volume.to_numpy()
+    signed = np.where(c[1:] > c[:-1], v[1:], np.where(c[1:] < c[:-1], -v[1:], 0))
+    obv = np.concatenate(([0], np.cumsum(signed)))
+    return pd.Series(obv, index=close.index)
+
+
+def compute_true_range(df: pd.DataFrame, period: int = 14) -> dict:
+    """
+    حساب True Range و ATR و Directional Movement مرة واحدة لكل إطار،
+    ليُعاد استخدامها في ADX وإشارات DI ووقف الخسارة (ATR).
+
+    Returns dict بالمفاتيح: tr, atr, plus_dm, minus_dm, plus_di, minus_di
     """
     high = df['High']
     low = df['Low']
-    close = df['Close']
+    h = high.to_numpy(dtype=float)
+    l = low.to_numpy(dtype=float)
+    prev_close = df['Close'].shift().to_numpy(dtype=float)
+    # fmax يتجاهل NaN مثل pd.concat(...).max(axis=1)
+    tr = pd.Series(
+        np.fmax(np.abs(h - l), np.fmax(np.abs(h - prev_close), np.abs(l - prev_close))),
+        index=high.index
+    )
+    atr = tr.rolling(window=period).mean()
     plus_dm = high.diff().clip(lower=0)
     minus_dm = low.diff().abs().clip(lower=0)
-    tr1 = (high - low).abs()
-    tr2 = (high - close.shift()).abs()
-    tr3 = (low - close.shift()).abs()
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-    atr = tr.rolling(window=period).mean()
-    plus_di = 100 * (plus_dm.rolling(window=period).mean() / atr)
-    minus_di = 100 * (minus_dm.rolling(window=period).mean() / atr)
+    return {
+        'tr': tr,
+        'atr': atr,
+        'plus_dm': plus_dm,
+        'minus_dm': minus_dm,
+        'plus_di': 100 * (plus_dm.rolling(window=period).mean() / atr),
+        'minus_di': 100 * (minus_dm.rolling(window=period).mean() / atr),
+    }
+
+
+def calculate_adx(df: pd.DataFrame, period: int = 14, dm: dict = None) -> pd.Series:
+    """
+    حساب مؤشر قوة الاتجاه (ADX)
+    - dm: نتيجة compute_true_range إن كانت محسوبة مسبقاً
+    """
+    if dm is None:
+        dm = compute_true_range(df, period)
+    plus_di = dm['plus_di']
+    minus_di = dm['minus_di']
     dx = (abs(plus_di - minus_di) / (plus_di + minus_di)) * 100
     adx = dx.rolling(window=period).mean()
     return adx
 
 
-def calculate_technical_indicators(df: pd.DataFrame):
+# ===============================
+# Indicator Registry
+# ===============================
+
+@dataclass
+class Indicator:
+    """مؤشر مسجّل: مدخلاته ومخرجاته ودالة الحساب."""
+    name: str
+    inputs: Tuple[str, ...]
+    outputs: Tuple[str, ...]
+    func: Callable[[Dict], Dict]
+    intermediate: bool = False  # مخرجات وسيطة لا تُكتب في الإطار
+
+
+INDICATORS: Dict[str, Indicator] = {}
+_PRODUCERS: Dict[str, str] = {}
+
+
+def register_indicator(name: str, inputs: Iterable[str], outputs: Iterable[str], intermediate: bool = False):
+    """Decorator لتسجيل مؤشر في الـ registry."""
+    def decorator(func):
+        indicator = Indicator(name, tuple(inputs), tuple(outputs), func, intermediate)
+        INDICATORS[name] = indicator
+        for col in indicator.outputs:
+            _PRODUCERS[col] = name
+        return func
+    return decorator
+
+
+def _register_rsi(period):
+    register_indicator(f'rsi_{period}', ['Close'], [f'RSI_{period}'])(
+        lambda ctx: {f'RSI_{period}': compute_rsi_wilder(ctx['Close'], period)}
+    )
+
+
+for _period in (7, 14, 21):
+    _register_rsi(_period)
+
+
+@register_indicator('rsi', ['RSI_21'], ['RSI'])
+def _rsi(ctx):
+    return {'RSI': ctx['RSI_21']}
+
+
+@register_indicator('ema_12_26', ['Close'], ['EMA_12', 'EMA_26'], intermediate=True)
+def _ema_12_26(ctx):
+    return {
+        'EMA_12': ctx['Close'].ewm(span=12, adjust=False).mean(),
+        'EMA_26': ctx['Close'].ewm(span=26, adjust=False).mean(),
+    }
+
+
+@register_indicator('macd', ['EMA_12', 'EMA_26'], ['MACD', 'MACD_Signal', 'MACD_Histogram'])
+def _macd(ctx):
+    macd = ctx['EMA_12'] - ctx['EMA_26']
+    macd_signal = macd.ewm(span=9, adjust=False).mean()
+    return {'MACD': macd, 'MACD_Signal': macd_signal, 'MACD_Histogram': macd - macd_signal}
+
+
+@register_indicator('bollinger', ['Close'], ['BB_Middle', 'BB_Upper', 'BB_Lower', 'Bollinger_%B'])
+def _bollinger(ctx, window=20):
+    middle = ctx['Close'].rolling(window).mean()
+    std = ctx['Close'].rolling(window).std()
+    upper = middle + 2 * std
+    lower = middle - 2 * std
+    return {
+        'BB_Middle': middle,
+        'BB_Upper': upper,
+        'BB_Lower': lower,
+        'Bollinger_%B': (ctx['Close'] - lower) / (upper - lower),
+    }
+
+
+@register_indicator('ema_signal', ['EMA_12', 'EMA_26'], ['EMA_signal'])
+def _ema_signal(ctx):
+    golden = ctx['EMA_12'] > ctx['EMA_26']
+    return {'EMA_signal': signal_code(golden, ~golden)}
+
+
+@register_indicator('true_range', ['High', 'Low', 'Close'], ['_dm'], intermediate=True)
+def _true_range(ctx):
+    return {'_dm': compute_true_range(ctx, 14)}
+
+
+@register_indicator('atr', ['_dm'], ['ATR_14'])
+def _atr(ctx):
+    return {'ATR_14': ctx['_dm']['tr'].rolling(window=14, min_periods=1).mean()}
+
+
+@register_indicator('adx', ['_dm'], ['ADX'])
+def _adx(ctx):
+    return {'ADX': calculate_adx(None, 14, ctx['_dm'])}
+
+
+@register_indicator('obv', ['Close', 'Volume'], ['OBV'])
+def _obv(ctx):
+    return {'OBV': compute_obv(ctx['Close'], ctx['Volume'])}
+
+
+@register_indicator('pivots', ['High', 'Low', 'Close'], ['Pivot', 'R1', 'S1', 'R2', 'S2'])
+def _pivots(ctx):
+    high, low = ctx['High'], ctx['Low']
+    pivot = (high + low + ctx['Close']) / 3
+    return {
+        'Pivot': pivot,
+        'R1': 2 * pivot - low,
+        'S1': 2 * pivot - high,
+        'R2': pivot + (high - low),
+        'S2': pivot - (high - low),
+    }
+
+
+@register_indicator('swing_levels', ['Close'], ['Long_Resistance', 'Long_Support'])
+def _swing_levels(ctx):
+    swing_highs, swing_lows = detect_swing_levels(ctx['Close'], order=10)
+    return {
+        'Long_Resistance': max((price for _, price in swing_highs), default=np.nan),
+        'Long_Support': min((price for _, price in swing_lows), default=np.nan),
+    }
+
+
+@register_indicator('macd_signal', ['MACD', 'MACD_Signal'], ['MACD_Trade_Signal'])
+def _macd_trade_signal(ctx):
+    return {'MACD_Trade_Signal': signal_code(ctx['MACD'] > ctx['MACD_Signal'], ctx['MACD'] < ctx['MACD_Signal'])}
+
+
+@register_indicator('obv_signal', ['OBV'], ['OBV_Signal'])
+def _obv_signal(ctx):
+    obv_diff = ctx['OBV'].diff()
+    return {'OBV_Signal': signal_code(obv_diff > 0, obv_diff < 0)}
+
+
+@register_indicator('bb_signal', ['Close', 'BB_Upper', 'BB_Lower'], ['BB_Signal'])
+def _bb_signal(ctx):
+    close = ctx['Close']
+    # Sell له الأولوية عند تحقق الشرطين
+    return {'BB_Signal': signal_code((close < ctx['BB_Lower']) & ~(close > ctx['BB_Upper']), close > ctx['BB_Upper'])}
+
+
+@register_indicator('stochastic', ['High', 'Low', 'Close'], ['Stoch_K', 'Stoch_D', 'Stoch_Signal'])
+def _stochastic(ctx):
+    low_min = ctx['Low'].rolling(14).min()
+    high_max = ctx['High'].rolling(14).max()
+    stoch_k = 100 * (ctx['Close'] - low_min) / (high_max - low_min)
+    stoch_d = stoch_k.rolling(3).mean()
+    return {'Stoch_K': stoch_k, 'Stoch_D': stoch_d, 'Stoch_Signal': signal_code(stoch_k > stoch_d, stoch_k < stoch_d)}
+
+
+@register_indicator('directional', ['_dm'], ['Plus_DI', 'Minus_DI', 'ADX_Signal'])
+def _directional(ctx):
+    plus_di, minus_di = ctx['_dm']['plus_di'], ctx['_dm']['minus_di']
+    return {'Plus_DI': plus_di, 'Minus_DI': minus_di, 'ADX_Signal': signal_code(plus_di > minus_di, plus_di < minus_di)}
+
+
+@register_indicator('sma', ['Close'], ['SMA_20', 'SMA_50'])
+def _sma(ctx):
+    return {
+        'SMA_20': ctx['Close'].rolling(window=20).mean(),
+        'SMA_50': ctx['Close'].rolling(window=50).mean(),
+    }
+
+
+INDICATOR_COLUMNS: List[str] = [
+    col for ind in INDICATORS.values() if not ind.intermediate for col in ind.outputs
+]
+
+
+def _resolve_order(columns: Iterable[str], available: Iterable[str]) -> List[Indicator]:
+    """ترتيب المؤشرات المطلوبة مع اعتمادياتها (DFS على الـ DAG)."""
+    available = set(available)
+    order, visiting, done = [], set(), set()
+
+    def visit(name):
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError(f"Circular indicator dependency at: {name}")
+        visiting.add(name)
+        for dep in INDICATORS[name].inputs:
+            if dep in available:
+                continue
+            if dep not in _PRODUCERS:
+                raise ValueError(f"Missing input column: {dep}")
+            visit(_PRODUCERS[dep])
+        visiting.discard(name)
+        done.add(name)
+        order.append(INDICATORS[name])
+
+    for col in columns:
+        if col not in _PRODUCERS:
+            raise ValueError(f"Unknown indicator column: {col}")
+        visit(_PRODUCERS[col])
+    return order
+
+
+def compute_indicators(df: pd.DataFrame, columns: Iterable[str] = None, compact: bool = False) -> pd.DataFrame:
+    """
+    حساب المؤشرات المطلوبة فقط (مع اعتمادياتها) عبر الـ registry.
+    النتائج الوسيطة المشتركة (مثل EMA و True Range) تُحسب مرة واحدة.
+
+    - columns: أعمدة المؤشرات المطلوبة (None = كل المؤشرات)
+    - compact: إبقاء أعمدة الإشارات كرموز int8 بدل النصوص (انظر signal_codes)
+    Returns: نسخة من df مع أعمدة المؤشرات المحسوبة (دون حذف القيم الفارغة)
+    """
+    columns = INDICATOR_COLUMNS if columns is None else list(columns)
+    order = _resolve_order(columns, df.columns)
+
+    ctx = {col: df[col] for col in df.columns}
+    for indicator in order:
+        ctx.update(indicator.func(ctx))
+
+    # الكتابة بترتيب التسجيل للحفاظ على ترتيب الأعمدة
+    data = df.copy()
+    evaluated = {ind.name for ind in order}
+    for indicator in INDICATORS.values():
+        if indicator.name in evaluated and not indicator.intermediate:
+            for col in indicator.outputs:
+                if col in SIGNAL_LABELS and not compact:
+                    data[col] = decode_signal(ctx[col], col)
+                else:
+                    data[col] = ctx[col]
+    return data
+
+
+FIB_RATIOS = {
+    'Fib_23.6': 0.236,
+    'Fib_38.2': 0.382,
+    'Fib_50': 0.5,
+    'Fib_61.8': 0.618,
+    'Fib_78.6': 0.786,
+}
+
+
+def _confirmed_extreme(values: np.ndarray) -> np.ndarray:
+    """
+    أعلى قمة محلية (بتعريف find_peaks) معروفة عند كل صف: القمة تُحتسب من الصف
+    الذي يليه أول سعر أدنى منها، لذا لا تستخدم أي سعر لاحق.
+    """
+    peaks, props = find_peaks(values, plateau_size=1)
+    at_row = np.full(len(values), np.nan)
+    # شرط distance لا يحذف أعلى قمة أبداً، لذا يكفي المرور على كل القمم المحلية
+    np.fmax.at(at_row, props['right_edges'] + 1, values[peaks])
+    return np.fmax.accumulate(at_row) if len(values) else at_row
+
+
+def _rolling_histogram_zones(close: np.ndarray, window: int, bins: int, top: int) -> np.ndarray:
+    """
+    histogram لكل نافذة من آخر window إغلاقات (نفس حدود np.histogram) وأكثر top
+    صناديق تكراراً. Returns: مصفوفة (n, top, 2) بحدود كل منطقة مرتبة حسب السعر.
+    """
+    n = len(close)
+    zones = np.full((n, top, 2), np.nan)
+    if n < window:
+        return zones
+    win = np.lib.stride_tricks.sliding_window_view(close, window)
+    valid = ~np.isnan(win).any(axis=1)
+    win = win[valid]
+    lo, hi = win.min(axis=1), win.max(axis=1)
+    flat = lo == hi
+    lo, hi = np.where(flat, lo - 0.5, lo), np.where(flat, hi + 0.5, hi)
+    # نفس حساب np.linspace لحدود الصناديق
+    edges = np.arange(bins + 1) * ((hi - lo) / bins)[:, None] + lo[:, None]
+    edges[:, -1] = hi
+    idx = ((win - lo[:, None]) / (hi - lo)[:, None] * bins).astype(np.intp)
+    idx[idx == bins] -= 1
+    rows = np.arange(len(win))[:, None]
+    idx[win < edges[rows, idx]] -= 1
+    idx[(win >= edges[rows, idx + 1]) & (idx != bins - 1)] += 1
+    counts = np.bincount((rows * bins + idx).ravel(), minlength=len(win) * bins).reshape(-1, bins)
+    top_idxs = np.sort(np.argsort(counts, axis=1)[:, -top:], axis=1)
+    out = zones[window - 1:]
+    out[valid, :, 0] = np.take_along_axis(edges, top_idxs, axis=1)
+    out[valid, :, 1] = np.take_along_axis(edges, top_idxs + 1, axis=1)
+    return zones
+
+
+def compute_rolling_levels(df: pd.DataFrame, fib_window: int = None, sr_window: int = 20,
+                           sr_bins: int = 20, sr_top: int = 3) -> pd.DataFrame:
+    """
+    مستويات Swing و Fibonacci و SR Zones لكل صف من بيانات حتى ذلك الصف فقط
+    (بدون look-ahead) لاستخدامها في الاختبار التاريخي.
+
+    - Long_Resistance/Long_Support: أعلى Swing High / أدنى Swing Low مؤكد حتى الصف
+    - Fib_*: من أعلى High وأدنى Low منذ البداية (fib_window=None) أو آخر fib_window صف
+    - SR_Zone_{k}_Low/High: مناطق histogram آخر sr_window إغلاقات
+
+    قيم آخر صف تساوي ما يعيده calculate_technical_indicators للإطار كاملاً.
+    """
+    close = df['Close'].to_numpy(dtype=float)
+    levels = pd.DataFrame(index=df.index)
+    levels['Long_Resistance'] = _confirmed_extreme(close)
+    levels['Long_Support'] = -_confirmed_extreme(-close)
+
+    if fib_window is None:
+        max_high, min_low = df['High'].cummax(), df['Low'].cummin()
+    else:
+        # rolling max/min في pandas تعتمد على deque رتيب: O(n) لأي طول نافذة
+        max_high = df['High'].rolling(fib_window, min_periods=1).max()
+        min_low = df['Low'].rolling(fib_window, min_periods=1).min()
+    diff = max_high - min_low
+    for name, ratio in FIB_RATIOS.items():
+        levels[name] = max_high - diff * ratio
+
+    zones = _rolling_histogram_zones(close, sr_window, sr_bins, sr_top)
+    for k in range(sr_top):
+        levels[f'SR_Zone_{k + 1}_Low'] = zones[:, k, 0]
+        levels[f'SR_Zone_{k + 1}_High'] = zones[:, k, 1]
+    return levels
+
+
+def calculate_technical_indicators(df: pd.DataFrame, compact: bool = False, point_in_time: bool = False):
     """
     حساب المؤشرات الفنية الكاملة لسلسلة أسعار.
+    - compact: أعمدة الإشارات كرموز int8 (تُحوَّل لنصوص في الواجهة والتقرير فقط)
+    - point_in_time: Long_Resistance/Long_Support لكل صف من البيانات حتى ذلك الصف،
+      مع إضافة أعمدة Fib_* و SR_Zone_* المتحركة (compute_rolling_levels) للاختبار التاريخي.
+      نفس صفوف الوضع الافتراضي؛ هذه الأعمدة تبقى NaN في صفوف الإحماء الأولى
 
     Returns:
     - data_clean: DataFrame بعد إضافة المؤشرات وتنظيف القيم الفارغة
     - fib_levels: dict بمستويات فيبوناتشي للسلسلة كاملة
     - sr_zones: قائمة بمناطق الدعم/المقاومة المكتشفة عبر histogram
     """
-    data = df.copy()
-
-    # ----- RSI بفترات مختلفة -----
-    data['RSI_7'] = compute_rsi_wilder(data['Close'], 7)
-    data['RSI_14'] = compute_rsi_wilder(data['Close'], 14)
-    data['RSI_21'] = compute_rsi_wilder(data['Close'], 21)
-    data['RSI'] = data['RSI_21']
-
-    # ----- MACD -----
-    data['EMA_12'] = data['Close'].ewm(span=12, adjust=False).mean()
-    data['EMA_26'] = data['Close'].ewm(span=26, adjust=False).mean()
-    data['MACD'] = data['EMA_12'] - data['EMA_26']
-    data['MACD_Signal'] = data['MACD'].ewm(span=9, adjust=False).mean()
-    data['MACD_Histogram'] = data['MACD'] - data['MACD_Signal']
-
-    # ----- Bollinger Bands -----
-    window = 20
-    data['BB_Middle'] = data['Close'].rolling(window).mean()
-    std = data['Close'].rolling(window).std()
-    data['BB_Upper'] = data['BB_Middle'] + 2 * std
-    data['BB_Lower'] = data['BB_Middle'] - 2 * std
-    data['Bollinger_%B'] = (data['Close'] - data['BB_Lower']) / (data['BB_Upper'] - data['BB_Lower'])
-
-    # ----- EMA Crossover Signal -----
-    data['EMA_signal'] = np.where(data['EMA_12'] > data['EMA_26'], 'Golden Cross', 'Death Cross')
-    data.drop(['EMA_12', 'EMA_26'], axis=1, inplace=True)
-
-    # ----- ADX -----
-    data['ADX'] = calculate_adx(data)
-
-    # ----- OBV -----
-    obv = [0]
-    for i in range(1, len(data)):
-        if data['Close'].iat[i] > data['Close'].iat[i-1]:
-            obv.append(obv[-1] + data['Volume'].iat[i])
-        elif data['Close'].iat[i] < data['Close'].iat[i-1]:
-            obv.append(obv[-1] - data['Volume'].iat[i])
-        else:
-            obv.append(obv[-1])
-    data['OBV'] = obv
-
-    # ----- Pivot Points -----
-    pivot = (data['High'] + data['Low'] + data['Close']) / 3
-    data['Pivot'] = pivot
-    data['R1'] = 2 * pivot - data['Low']
-    data['S1'] = 2 * pivot - data['High']
-    data['R2'] = pivot + (data['High'] - data['Low'])
-    data['S2'] = pivot - (data['High'] - data['Low'])
+    data = compute_indicators(df, compact=compact)
+    warmup_columns = []
+    if point_in_time:
+        levels = compute_rolling_levels(data)
+        for col in levels.columns:
+            data[col] = levels[col]
+        # المستويات المتحركة فارغة في أول الصفوف (قبل أول قمة/قاع مؤكد)؛ لا تُحذف
+        # الصفوف بسببها حتى يعيد الوضعان نفس الصفوف
+        warmup_columns = list(levels.columns)
 
     # ----- SR Zones -----
+    window = 20
     prices_hist = data['Close'].tail(window)
     hist, bins = np.histogram(prices_hist, bins=20)
     top_idxs = np.argsort(hist)[-3:]
     sr_zones = [(bins[i], bins[i+1]) for i in sorted(top_idxs)]
 
-    # ----- Swing High/Low -----
-    swing_highs, swing_lows = detect_swing_levels(data['Close'], order=10)
-    data['Long_Resistance'] = max((price for _, price in swing_highs), default=np.nan)
-    data['Long_Support'] = min((price for _, price in swing_lows), default=np.nan)
-
     # ----- Fibonacci Levels -----
     maxH, minL = data['High'].max(), data['Low'].min()
     diff = maxH - minL
-    fib_levels = {
-        'Fib_23.6': maxH - diff * 0.236,
-        'Fib_38.2': maxH - diff * 0.382,
-        'Fib_50': maxH - diff * 0.5,
-        'Fib_61.8': maxH - diff * 0.618,
-        'Fib_78.6': maxH - diff * 0.786
-    }
-
-    # ----- Signals -----
-    data['MACD_Trade_Signal'] = np.where(data['MACD'] > data['MACD_Signal'], 'Buy',
-                                       np.where(data['MACD'] < data['MACD_Signal'], 'Sell', 'Hold'))
-    data['OBV_Signal'] = np.where(data['OBV'].diff() > 0, 'Buy',
-                                  np.where(data['OBV'].diff() < 0, 'Sell', 'Hold'))
-    data['BB_Signal'] = np.where(data['Close'] > data['BB_Upper'], 'Sell',
-                                  np.where(data['Close'] < data['BB_Lower'], 'Buy', 'Hold'))
-    low_min = data['Low'].rolling(14).min()
-    high_max = data['High'].rolling(14).max()
-    data['Stoch_K'] = 100 * (data['Close'] - low_min) / (high_max - low_min)
-    data['Stoch_D'] = data['Stoch_K'].rolling(3).mean()
-    data['Stoch_Signal'] = np.where(data['Stoch_K'] > data['Stoch_D'], 'Buy',
-                                    np.where(data['Stoch_K'] < data['Stoch_D'], 'Sell', 'Hold'))
-    plus_dm = data['High'].diff().clip(lower=0)
-    minus_dm = data['Low'].diff().abs().clip(lower=0)
-    tr1 = (data['High'] - data['Low']).abs()
-    tr2 = (data['High'] - data['Close'].shift()).abs()
-    tr3 = (data['Low'] - data['Close'].shift()).abs()
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-    atr = tr.rolling(14).mean()
-    data['Plus_DI'] = 100 * (plus_dm.rolling(14).mean() / atr)
-    data['Minus_DI'] = 100 * (minus_dm.rolling(14).mean() / atr)
-    data['ADX_Signal'] = np.where(data['Plus_DI'] > data['Minus_DI'], 'Buy',
-                                  np.where(data['Plus_DI'] < data['Minus_DI'], 'Sell', 'Hold'))
-
-    # ----- SMAs -----
-    data['SMA_20'] = data['Close'].rolling(window=20).mean()
-    data['SMA_50'] = data['Close'].rolling(window=50).mean()
+    fib_levels = {name: maxH - diff * ratio for name, ratio in FIB_RATIOS.items()}
 
     # ----- Clean and return -----
-    data_clean = data.dropna(how='any').reset_index(drop=True)
+    subset = [col for col in data.columns if col not in warmup_columns]
+    data_clean = data.dropna(how='any', subset=subset).reset_index(drop=True)
     return data_clean, fib_levels, sr_zones
@@ -2,17 +2,79 @@ import pandas as pd
 import yfinance as yf
 from datetime import datetime
 from typing import Tuple, Dict, Optional, Union
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+import time
 import warnings
 warnings.filterwarnings('ignore')
 
-def fetch_fundamental_data(symbol: str) -> Tuple[Optional[dict], str]:
+import fundamental_cache
+from fundamental_cache import STATEMENTS
+
+
+def _fetch_statement(stock, name: str) -> pd.DataFrame:
+    """جلب قائمة مالية واحدة مع إرجاع DataFrame فارغ عند الفشل."""
+    try:
+        df = getattr(stock, name)
+        return df if df is not None else pd.DataFrame()
+    except:
+        return pd.DataFrame()
+
+
+def _fetch_statements_concurrent(stock, names, timeout: float) -> Dict[str, pd.DataFrame]:
+    """
+    جلب عدة قوائم مالية بالتوازي (كل قائمة طلب I/O مستقل).
+    المهلة timeout لكل طلب على حدة، محسوبة من لحظة بدء تنفيذه هو، فلا يستهلك
+    طلب بطيء مهلة الطلبات التي تُجمع بعده.
+    أي قائمة تتجاوز مهلتها أو تفشل تُستبدل بـ DataFrame فارغ.
+    """
+    results = {}
+    started = {}
+
+    def fetch(name):
+        started[name] = time.monotonic()
+        return _fetch_statement(stock, name)
+
+    executor = ThreadPoolExecutor(max_workers=max(1, len(names)))
+    try:
+        submitted = time.monotonic()
+        futures = {name: executor.submit(fetch, name) for name in names}
+        for name, future in futures.items():
+            # طلب لم يبدأ بعد تُحسب مهلته من لحظة الإرسال
+            deadline = started.get(name, submitted) + timeout
+            try:
+                results[name] = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except FuturesTimeoutError:
+                results[name] = pd.DataFrame()
+    finally:
+        # لا ننتظر الطلبات العالقة بعد انتهاء المهلة
+        executor.shutdown(wait=False, cancel_futures=True)
+    return results
+
+
+def _cache_call(func, *args, default=None):
+    """أخطاء التخزين المحلي لا يجب أن توقف الجلب."""
+    try:
+        return func(*args)
+    except Exception:
+        return default
+
+
+def fetch_fundamental_data(symbol: str, use_cache: bool = True,
+                           concurrent: bool = False,
+                           timeout: float = 20.0) -> Tuple[Optional[dict], str]:
     """
     متوافق مع ui.py: يجلب البيانات المالية الأساسية والبيانات التفصيلية المطلوبة.
+    عند use_cache يُقرأ info والقوائم المالية من التخزين المحلي ما دامت ضمن مدة صلاحيتها.
+    عند concurrent تُجلب القوائم الناقصة بالتوازي مع مهلة timeout (ثوانٍ) لكل طلب.
     """
     try:
         symbol = symbol.upper().strip()
         stock = yf.Ticker(symbol)
-        info = stock.info
+        info = _cache_call(fundamental_cache.load_info, symbol) if use_cache else None
+        if info is None:
+            info = stock.info
+            if use_cache and info and (info.get('longName') or info.get('shortName')):
+                _cache_call(fundamental_cache.store_info, symbol, info)
 
         if not info or (not info.get('longName') and not info.get('shortName')):
             return None, f"Invalid symbol or no data available for: {symbol}"
@@ -58,34 +120,26 @@ def fetch_fundamental_data(symbol: str) -> Tuple[Optional[dict], str]:
         }
 
         # (2) القوائم المالية (لتحليل الأداء المالي)
-        try:
-            financials = stock.financials
-        except: financials = pd.DataFrame()
-        try:
-            balance_sheet = stock.balance_sheet
-        except: balance_sheet = pd.DataFrame()
-        try:
-            cashflow = stock.cashflow
-        except: cashflow = pd.DataFrame()
-        try:
-            quarterly_financials = stock.quarterly_financials
-        except: quarterly_financials = pd.DataFrame()
-        try:
-            quarterly_balance_sheet = stock.quarterly_balance_sheet
-        except: quarterly_balance_sheet = pd.DataFrame()
-        try:
-            quarterly_cashflow = stock.quarterly_cashflow
-        except: quarterly_cashflow = pd.DataFrame()
+        statements = {}
+        for name in STATEMENTS:
+            statements[name] = _cache_call(fundamental_cache.load_statement, symbol, name) if use_cache else None
+        missing = [name for name, df in statements.items() if df is None]
+
+        if concurrent and missing:
+            fetched = _fetch_statements_concurrent(stock, missing, timeout)
+        else:
+            fetched = {name: _fetch_statement(stock, name) for name in missing}
+
+        for name, df in fetched.items():
+            # لا نخزن القوائم الفارغة حتى يُعاد المحاولة في الاستدعاء التالي
+            if use_cache and not df.empty:
+                _cache_call(fundamental_cache.store_statement, symbol, name, df)
+            statements[name] = df
 
         # (3) إعداد الدكتشنري النهائي بنفس هيكلية ui.py
         result = {
             "basic_info": basic_info,
-            "financials": financials,
-            "balance_sheet": balance_sheet,
-            "cashflow": cashflow,
-            "quarterly_financials": quarterly_financials,
-            "quarterly_balance_sheet": quarterly_balance_sheet,
-            "quarterly_cashflow": quarterly_cashflow,
+            **statements,
         }
         return result, f"Successfully fetched fundamental data for {symbol}"
 
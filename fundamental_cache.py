@@ -0,0 +1,101 @@
+# fundamental_cache.py
+import os
+import json
+import time
+import shutil
+import pandas as pd
+from typing import Iterable, Optional
+
+from price_cache import CACHE_DIR
+
+FUNDAMENTAL_CACHE_DIR = os.path.join(CACHE_DIR, 'fundamentals')
+
+# مدة الصلاحية بالثواني: info يتغير خلال اليوم، القوائم المالية فصلية
+INFO_TTL = 15 * 60
+STATEMENT_TTL = 3 * 24 * 60 * 60
+
+STATEMENTS = (
+    'financials',
+    'balance_sheet',
+    'cashflow',
+    'quarterly_financials',
+    'quarterly_balance_sheet',
+    'quarterly_cashflow',
+)
+
+
+def _symbol_dir(symbol: str) -> str:
+    return os.path.join(FUNDAMENTAL_CACHE_DIR, symbol.upper().strip().replace('/', '_'))
+
+
+def _read_meta(symbol: str) -> dict:
+    path = os.path.join(_symbol_dir(symbol), 'meta.json')
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def _write_meta(symbol: str, meta: dict):
+    os.makedirs(_symbol_dir(symbol), exist_ok=True)
+    with open(os.path.join(_symbol_dir(symbol), 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+
+
+def _is_fresh(meta: dict, key: str, ttl: float) -> bool:
+    fetched_at = meta.get(key)
+    return fetched_at is not None and (time.time() - fetched_at) < ttl
+
+
+def load_info(symbol: str, ttl: float = INFO_TTL) -> Optional[dict]:
+    """يعيد قاموس info المخزن إن كان ضمن مدة الصلاحية، وإلا None."""
+    path = os.path.join(_symbol_dir(symbol), 'info.json')
+    if not os.path.exists(path) or not _is_fresh(_read_meta(symbol), 'info', ttl):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def store_info(symbol: str, info: dict):
+    os.makedirs(_symbol_dir(symbol), exist_ok=True)
+    with open(os.path.join(_symbol_dir(symbol), 'info.json'), 'w') as f:
+        json.dump(info, f, default=str)
+    meta = _read_meta(symbol)
+    meta['info'] = time.time()
+    _write_meta(symbol, meta)
+
+
+def load_statement(symbol: str, name: str, ttl: float = STATEMENT_TTL) -> Optional[pd.DataFrame]:
+    """يعيد القائمة المالية المخزنة إن كانت ضمن مدة الصلاحية، وإلا None."""
+    path = os.path.join(_symbol_dir(symbol), f"{name}.pkl")
+    if not os.path.exists(path) or not _is_fresh(_read_meta(symbol), name, ttl):
+        return None
+    return pd.read_pickle(path)
+
+
+def store_statement(symbol: str, name: str, df: pd.DataFrame):
+    os.makedirs(_symbol_dir(symbol), exist_ok=True)
+    df.to_pickle(os.path.join(_symbol_dir(symbol), f"{name}.pkl"))
+    meta = _read_meta(symbol)
+    meta[name] = time.time()
+    _write_meta(symbol, meta)
+
+
+def invalidate(symbol: str, info: bool = True, statements: Optional[Iterable[str]] = None):
+    """
+    إبطال التخزين لسهم معيّن.
+
+    - info: إبطال قاموس info
+    - statements: أسماء القوائم المراد إبطالها (None = كل القوائم)
+    """
+    if info and statements is None:
+        shutil.rmtree(_symbol_dir(symbol), ignore_errors=True)
+        return
+    meta = _read_meta(symbol)
+    if not meta:
+        return
+    if info:
+        meta.pop('info', None)
+    for name in (STATEMENTS if statements is None else statements):
+        meta.pop(name, None)
+    _write_meta(symbol, meta)
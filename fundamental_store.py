@@ -0,0 +1,295 @@
+# fundamental_store.py
+import os
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, Optional
+
+from analyze_financial import KEY_VARIATIONS, resolve_statement
+from fundamental_cache import STATEMENTS
+from fundamental_trends import TREND_ITEMS, compute_trend_metrics, score_trends
+from price_cache import CACHE_DIR
+
+FUNDAMENTAL_TABLE_PATH = os.path.join(CACHE_DIR, 'fundamentals.parquet')
+TABLE_COLUMNS = ['symbol', 'statement', 'period', 'period_idx', 'canonical_item', 'value']
+
+# البنود القياسية: أسماء KEY_VARIATIONS وبنود تُقرأ بالمطابقة الدقيقة فقط
+STATEMENT_ITEMS = tuple(KEY_VARIATIONS) + ('Long Term Debt', 'Current Debt')
+
+# حقول info المستخدمة في analyze_financial_performance (القيم الرقمية فقط)
+INFO_ITEMS = (
+    'returnOnEquity', 'returnOnAssets', 'debtToEquity', 'currentRatio',
+    'trailingPE', 'forwardPE', 'P/E TTM', 'P/E Ratio (TTM)', 'priceToBook',
+    'operatingCashflow', 'capitalExpenditures', 'capex', 'freeCashflow',
+    'totalDebt', 'totalAssets',
+)
+# هذه الحقول تُقبل فقط كأرقام (بدون تحويل نص)
+_NUMERIC_ONLY_INFO = ('returnOnEquity', 'returnOnAssets')
+
+
+def _period(label):
+    try:
+        return pd.Timestamp(label)
+    except (TypeError, ValueError):
+        return pd.NaT
+
+
+def normalize_statement(symbol: str, statement: str, df: pd.DataFrame) -> pd.DataFrame:
+    """
+    تحويل قائمة مالية (بنود × فترات) إلى صفوف (symbol, statement, period, period_idx,
+    canonical_item, value) بنفس قواعد safe_get_value. القيم المفقودة لا تُخزن.
+    period_idx = ترتيب العمود (0 = أحدث فترة).
+    """
+    rows = []
+    if df is not None and not df.empty:
+        resolved = resolve_statement(df)
+        for j, label in enumerate(df.columns):
+            period = _period(label)
+            for item in STATEMENT_ITEMS:
+                value = resolved.get(item, j, np.nan)
+                if value == value:
+                    rows.append((symbol, statement, period, j, item, value))
+    return pd.DataFrame(rows, columns=TABLE_COLUMNS)
+
+
+def _info_value(key, value):
+    """القيمة كما تستخدمها analyze_financial_performance، أو None إن كانت ستُتجاهل."""
+    if not value or (key in _NUMERIC_ONLY_INFO and not isinstance(value, (int, float))):
+        return None
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if value == value else None
+
+
+def normalize_fundamentals(symbol: str, fundamental_data: Dict) -> pd.DataFrame:
+    """
+    كل القوائم الست و info لسهم واحد (ناتج fetch_fundamental_data) كجدول طويل واحد.
+    حقول info تُخزن بـ statement='info' و period_idx=0.
+    """
+    symbol = symbol.upper().strip()
+    frames = [normalize_statement(symbol, name, fundamental_data.get(name)) for name in STATEMENTS]
+    basic_info = fundamental_data.get('basic_info') or {}
+    info_rows = []
+    for key in INFO_ITEMS:
+        value = _info_value(key, basic_info.get(key))
+        if value is not None:
+            info_rows.append((symbol, 'info', pd.NaT, 0, key, value))
+    frames.append(pd.DataFrame(info_rows, columns=TABLE_COLUMNS))
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame(columns=TABLE_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+def build_fundamental_table(items: Dict[str, Dict]) -> pd.DataFrame:
+    """جدول طويل لعدة أسهم: items = dict symbol -> fundamental_data."""
+    frames = [normalize_fundamentals(symbol, data) for symbol, data in items.items()]
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame(columns=TABLE_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+# ===============================
+# Persistence
+# ===============================
+
+def load_fundamental_table(symbols: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """قراءة الجدول المخزن (كاملاً أو لأسهم محددة)."""
+    if not os.path.exists(FUNDAMENTAL_TABLE_PATH):
+        return pd.DataFrame(columns=TABLE_COLUMNS)
+    table = pd.read_parquet(FUNDAMENTAL_TABLE_PATH)
+    if symbols is not None:
+        table = table[table['symbol'].isin([s.upper().strip() for s in symbols])]
+    return table.reset_index(drop=True)
+
+
+def store_fundamental_table(table: pd.DataFrame):
+    """
+    دمج الجدول مع المخزن: صفوف الأسهم الموجودة في table تستبدل صفوفها السابقة بالكامل.
+    """
+    os.makedirs(os.path.dirname(FUNDAMENTAL_TABLE_PATH), exist_ok=True)
+    stored = load_fundamental_table()
+    stored = stored[~stored['symbol'].isin(table['symbol'].unique())]
+    frames = [f for f in (stored, table) if not f.empty]
+    merged = pd.concat(frames, ignore_index=True) if frames else table
+    merged = merged.astype({'period_idx': 'int64', 'value': 'float64'})
+    merged.to_parquet(FUNDAMENTAL_TABLE_PATH, index=False)
+
+
+# ===============================
+# Vectorized Ratios
+# ===============================
+
+def _wide(table: pd.DataFrame, statements, max_period: int) -> pd.DataFrame:
+    subset = table[table['statement'].isin(statements) & (table['period_idx'] <= max_period)]
+    return subset.set_index(['symbol', 'statement', 'canonical_item', 'period_idx'])['value'] \
+        .unstack(['statement', 'canonical_item', 'period_idx'])
+
+
+def compute_ratios(table: pd.DataFrame) -> pd.DataFrame:
+    """
+    حساب مقاييس analyze_financial_performance (قبل التقريب) لكل الأسهم دفعة واحدة
+    من القوائم السنوية و info، بنفس البدائل الاحتياطية.
+
+    Returns: DataFrame (سهم لكل صف) بأعمدة مثل revenue_growth_%، net_margin_%، ROE_%،
+    debt_to_equity، current_ratio، free_cash_flow، P/E ...؛ القيم غير المتاحة NaN.
+    """
+    symbols = pd.Index(table['symbol'].unique(), name='symbol')
+    wide = _wide(table, ('financials', 'balance_sheet', 'cashflow', 'info'), 1).reindex(symbols)
+
+    def get(statement, item, idx=0):
+        key = (statement, item, idx)
+        if key in wide.columns:
+            return wide[key].to_numpy(dtype=float)
+        return np.full(len(symbols), np.nan)
+
+    def info(*keys):
+        # أول حقل متاح بالترتيب
+        values = get('info', keys[0])
+        for key in keys[1:]:
+            values = np.where(np.isnan(values), get('info', key), values)
+        return values
+
+    def ratio(num, den, valid, fallback=0.0):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(valid, num / den, fallback)
+
+    fill = np.nan_to_num
+
+    # ----- Revenue / Net Income -----
+    curr_rev = fill(get('financials', 'Total Revenue'))
+    prev_rev = np.where(np.isnan(get('financials', 'Total Revenue', 1)), curr_rev, get('financials', 'Total Revenue', 1))
+    rev_growth = ratio(curr_rev - prev_rev, np.abs(prev_rev), (prev_rev > 0) & (curr_rev != prev_rev)) * 100
+    curr_net = fill(get('financials', 'Net Income'))
+    prev_net = np.where(np.isnan(get('financials', 'Net Income', 1)), curr_net, get('financials', 'Net Income', 1))
+    net_growth = ratio(curr_net - prev_net, np.abs(prev_net), (prev_net != 0) & (curr_net != prev_net)) * 100
+
+    # ----- Profitability -----
+    operating_income = fill(get('financials', 'Operating Income'))
+    gross_margin = ratio(fill(get('financials', 'Gross Profit')), curr_rev, curr_rev > 0) * 100
+    operating_margin = ratio(operating_income, curr_rev, curr_rev > 0) * 100
+    net_margin = ratio(curr_net, curr_rev, curr_rev > 0) * 100
+
+    def pct(values):
+        return np.where(np.isnan(values), 0.0, np.where(np.abs(values) <= 1, values * 100, values))
+
+    equity = fill(get('balance_sheet', 'Stockholders Equity'))
+    roe = pct(info('returnOnEquity'))
+    roe = np.where((roe == 0) & (curr_net != 0) & (equity > 0), ratio(curr_net, equity, equity > 0) * 100, roe)
+    roa = pct(info('returnOnAssets'))
+
+    # ----- Balance Sheet -----
+    total_debt = fill(get('balance_sheet', 'Total Debt'))
+    total_debt = np.where(total_debt == 0,
+                          fill(get('balance_sheet', 'Long Term Debt')) + fill(get('balance_sheet', 'Current Debt')),
+                          total_debt)
+    info_debt = info('totalDebt')
+    total_debt = np.where((total_debt == 0) & ~np.isnan(info_debt), info_debt, total_debt)
+    total_assets = fill(get('balance_sheet', 'Total Assets'))
+    info_assets = info('totalAssets')
+    total_assets = np.where((total_assets == 0) & ~np.isnan(info_assets), info_assets, total_assets)
+    debt_to_assets = ratio(total_debt, total_assets, total_assets > 0)
+
+    curr_assets = fill(get('balance_sheet', 'Current Assets'))
+    curr_liab = fill(get('balance_sheet', 'Current Liabilities'))
+    debt_to_equity = fill(info('debtToEquity') / 100)
+    debt_to_equity = np.where((debt_to_equity == 0) & (equity > 0), ratio(total_debt, equity, equity > 0), debt_to_equity)
+    current_ratio = fill(info('currentRatio'))
+    current_ratio = np.where((current_ratio == 0) & (curr_liab > 0),
+                             ratio(curr_assets, curr_liab, curr_liab > 0), current_ratio)
+    inventory = fill(get('balance_sheet', 'Inventory'))
+    quick_ratio = ratio(curr_assets - inventory, curr_liab, curr_liab > 0)
+
+    # ----- Cash Flow -----
+    ocf = fill(get('cashflow', 'Operating Cash Flow'))
+    info_ocf = info('operatingCashflow')
+    ocf = np.where((ocf == 0) & ~np.isnan(info_ocf), info_ocf, ocf)
+    capex = np.abs(fill(get('cashflow', 'Capital Expenditure')))
+    info_capex = info('capitalExpenditures', 'capex')
+    capex = np.where((capex == 0) & ~np.isnan(info_capex), np.abs(info_capex), capex)
+    fcf = ocf - capex
+    info_fcf = info('freeCashflow')
+    fcf = np.where(~np.isnan(info_fcf) & (info_fcf != 0), info_fcf, fcf)
+
+    ebit = get('financials', 'EBIT')
+    ebit = np.where(np.isnan(ebit), operating_income, ebit)
+    interest_expense = np.abs(fill(get('financials', 'Interest Expense')))
+    shares_current = fill(get('balance_sheet', 'Common Stock'))
+    shares_previous = get('balance_sheet', 'Common Stock', 1)
+    shares_previous = np.where(np.isnan(shares_previous), shares_current, shares_previous)
+
+    # ----- Valuation -----
+    pe = info('trailingPE', 'forwardPE', 'P/E TTM', 'P/E Ratio (TTM)')
+    pb = info('priceToBook')
+
+    return pd.DataFrame({
+        'current_revenue': curr_rev,
+        'revenue_growth_%': rev_growth,
+        'net_income_growth_%': net_growth,
+        'gross_margin_%': gross_margin,
+        'operating_margin_%': operating_margin,
+        'net_margin_%': net_margin,
+        'ROE_%': roe,
+        'ROA_%': roa,
+        'total_debt': total_debt,
+        'total_assets': total_assets,
+        'debt_to_equity': debt_to_equity,
+        'debt_to_assets_%': debt_to_assets * 100,
+        'current_ratio': current_ratio,
+        'quick_ratio': quick_ratio,
+        'operating_cash_flow': ocf,
+        'capital_expenditure': capex,
+        'free_cash_flow': fcf,
+        'ocf_to_revenue_%': ratio(ocf, curr_rev, curr_rev > 0) * 100,
+        'fcf_to_revenue_%': ratio(fcf, curr_rev, curr_rev > 0) * 100,
+        'interest_coverage': ratio(ebit, interest_expense, interest_expense > 0, np.nan),
+        'shares_change': ratio(shares_current - shares_previous, shares_previous, shares_previous > 0, np.nan) * 100,
+        'P/E': pe,
+        'P/B': pb,
+        'PEG': ratio(pe, rev_growth, (pe != 0) & (rev_growth > 0), np.nan),
+        'asset_turnover': ratio(curr_rev, total_assets, total_assets > 0),
+    }, index=symbols)
+
+
+# ===============================
+# Vectorized Multi-period Trends
+# ===============================
+
+def _period_matrices(table: pd.DataFrame, symbols: pd.Index, statements: Dict[str, str]) -> Dict[str, np.ndarray]:
+    """مصفوفة (أسهم × فترات) لكل بند من TREND_ITEMS؛ statements = بند -> اسم القائمة."""
+    matrices = {}
+    for item in TREND_ITEMS:
+        in_statement = table[table['statement'] == statements[item]]
+        # كل أعمدة القائمة حتى لو غاب البند عن بعضها، حتى تبقى الفترات في مواقعها
+        periods = range(int(in_statement['period_idx'].max()) + 1 if not in_statement.empty else 0)
+        subset = in_statement[in_statement['canonical_item'] == item]
+        wide = subset.pivot_table(index='symbol', columns='period_idx', values='value', aggfunc='first')
+        matrices[item] = wide.reindex(index=symbols, columns=periods).to_numpy(dtype=float)
+    return matrices
+
+
+def compute_trends(table: pd.DataFrame) -> pd.DataFrame:
+    """
+    مقاييس الاتجاه متعددة الفترات (CAGR، ميل الهوامش، TTM، نمو 4 أرباع متحركة)
+    لكل الأسهم دفعة واحدة من كل أعمدة القوائم السنوية والربعية في الجدول الطويل.
+
+    Returns: DataFrame (سهم لكل صف) بالمقاييس العددية و trend_score و trend_rating
+    """
+    symbols = pd.Index(table['symbol'].unique(), name='symbol')
+    cash_items = ('Operating Cash Flow', 'Capital Expenditure')
+    annual = _period_matrices(table, symbols, {
+        item: 'cashflow' if item in cash_items else 'financials' for item in TREND_ITEMS
+    })
+    quarterly = _period_matrices(table, symbols, {
+        item: 'quarterly_cashflow' if item in cash_items else 'quarterly_financials' for item in TREND_ITEMS
+    })
+    metrics = compute_trend_metrics(annual, quarterly)
+    trend_score, trend_rating = score_trends(metrics)
+    result = pd.DataFrame({
+        key: values for key, values in metrics.items() if np.ndim(values) == 1
+    }, index=symbols)
+    result['trend_score'] = trend_score
+    result['trend_rating'] = trend_rating
+    return result
@@ -0,0 +1,207 @@
+# fundamental_trends.py
+import numpy as np
+from typing import Dict
+
+# البنود المستخدمة في تحليل الاتجاه (أسماء KEY_VARIATIONS)
+TREND_ITEMS = (
+    'Total Revenue', 'Net Income', 'Gross Profit', 'Operating Income',
+    'Operating Cash Flow', 'Capital Expenditure',
+)
+
+# تصنيف الاتجاه: (أدنى درجة، التصنيف) من الأعلى للأدنى
+TREND_TIERS = (
+    (75, '🚀 Accelerating'),
+    (60, '📈 Improving'),
+    (45, '➡️ Stable'),
+    (30, '📉 Weakening'),
+    (-np.inf, '⚠️ Deteriorating'),
+)
+
+
+# ===============================
+# Array Primitives
+# ===============================
+# كل الدوال تعمل على مصفوفات (أسهم × فترات) والأعمدة من الأحدث للأقدم
+# كما في قوائم yfinance؛ القيم المفقودة NaN.
+
+def _as_2d(values) -> np.ndarray:
+    values = np.asarray(values, dtype=float)
+    return values[None, :] if values.ndim == 1 else values
+
+
+def period_growth(values, lag: int = 1) -> np.ndarray:
+    """نمو كل فترة % مقابل الفترة الأقدم منها بـ lag (NaN إن لم تتوفر القيمتان)."""
+    v = _as_2d(values)
+    out = np.full(v.shape, np.nan)
+    if v.shape[1] > lag:
+        curr, prev = v[:, :-lag], v[:, lag:]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out[:, :-lag] = np.where(prev != 0, (curr - prev) / np.abs(prev) * 100, np.nan)
+    return out
+
+
+def cagr(values, periods_per_year: int = 1) -> np.ndarray:
+    """
+    معدل النمو السنوي المركب % بين أحدث وأقدم قيمة متاحة في كل صف.
+    NaN إن كانت إحدى القيمتين غير موجبة أو لا توجد فترتان.
+    """
+    v = _as_2d(values)
+    n, p = v.shape
+    if p == 0:
+        return np.full(n, np.nan)
+    valid = ~np.isnan(v)
+    rows = np.arange(n)
+    newest_idx = valid.argmax(axis=1)
+    oldest_idx = p - 1 - valid[:, ::-1].argmax(axis=1)
+    newest, oldest = v[rows, newest_idx], v[rows, oldest_idx]
+    years = (oldest_idx - newest_idx) / periods_per_year
+    ok = valid.any(axis=1) & (years > 0) & (newest > 0) & (oldest > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(ok, ((newest / oldest) ** (1 / np.where(ok, years, 1)) - 1) * 100, np.nan)
+
+
+def trailing_sum(values, window: int = 4) -> np.ndarray:
+    """
+    مجموع آخر window فترات لكل عمود (TTM عند window=4 على الربعيات).
+    العمود k = مجموع الفترات k..k+window-1؛ NaN إن نقصت أي فترة.
+    """
+    v = _as_2d(values)
+    out = np.full(v.shape, np.nan)
+    if v.shape[1] >= window:
+        windows = np.lib.stride_tricks.sliding_window_view(v, window, axis=1)
+        out[:, :v.shape[1] - window + 1] = windows.sum(axis=2)
+    return out
+
+
+def margin_history(numerator, revenue) -> np.ndarray:
+    """الهامش % لكل فترة (NaN حيث الإيراد غير موجب)."""
+    numerator, revenue = _as_2d(numerator), _as_2d(revenue)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(revenue > 0, numerator / revenue * 100, np.nan)
+
+
+def trend_slope(values) -> np.ndarray:
+    """
+    ميل خط الاتجاه بالمربعات الصغرى (تغير لكل فترة بالترتيب الزمني) متجاهلاً NaN.
+    موجب = تحسن؛ NaN إن توفرت أقل من نقطتين.
+    """
+    v = _as_2d(values)
+    n, p = v.shape
+    t = np.arange(p - 1, -1, -1, dtype=float)
+    mask = ~np.isnan(v)
+    count = mask.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_t = np.where(mask, t, 0).sum(axis=1) / count
+        mean_v = np.where(mask, v, 0).sum(axis=1) / count
+        dt = np.where(mask, t - mean_t[:, None], 0)
+        dv = np.where(mask, v - mean_v[:, None], 0)
+        var = (dt * dt).sum(axis=1)
+        return np.where((count >= 2) & (var > 0), (dt * dv).sum(axis=1) / var, np.nan)
+
+
+def _first_valid(values) -> np.ndarray:
+    """أحدث قيمة متاحة في كل صف."""
+    v = _as_2d(values)
+    if v.shape[1] == 0:
+        return np.full(v.shape[0], np.nan)
+    valid = ~np.isnan(v)
+    return np.where(valid.any(axis=1), v[np.arange(v.shape[0]), valid.argmax(axis=1)], np.nan)
+
+
+# ===============================
+# Trend Engine
+# ===============================
+
+def compute_trend_metrics(annual: Dict[str, np.ndarray], quarterly: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    حساب مقاييس الاتجاه متعددة الفترات لكل الأسهم دفعة واحدة.
+
+    - annual / quarterly: dict بند (من TREND_ITEMS) -> مصفوفة (أسهم × فترات)،
+      والبنود الناقصة تُعامل كـ NaN.
+
+    Returns: dict اسم المقياس -> مصفوفة (أسهم،) أو (أسهم × فترات) للسلاسل
+    (revenue_growth_history، *_margin_history، ttm_revenue_history).
+    """
+    shapes = [np.shape(_as_2d(v)) for v in list(annual.values()) + list(quarterly.values())]
+    n = shapes[0][0] if shapes else 0
+
+    def item(source, key):
+        if key in source:
+            return _as_2d(source[key])
+        p = max((_as_2d(v).shape[1] for v in source.values()), default=0)
+        return np.full((n, p), np.nan)
+
+    revenue = item(annual, 'Total Revenue')
+    net_income = item(annual, 'Net Income')
+    revenue_growth = period_growth(revenue)
+    # نسبة السنوات ذات نمو إيراد موجب من السنوات المتاحة
+    growth_count = (~np.isnan(revenue_growth)).sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        consistency = np.where(growth_count > 0, (revenue_growth > 0).sum(axis=1) / growth_count, np.nan)
+
+    gross_margin = margin_history(item(annual, 'Gross Profit'), revenue)
+    operating_margin = margin_history(item(annual, 'Operating Income'), revenue)
+    net_margin = margin_history(net_income, revenue)
+
+    # ----- Quarterly / TTM -----
+    q_revenue = item(quarterly, 'Total Revenue')
+    ttm_revenue = trailing_sum(q_revenue)
+    ttm_net_income = trailing_sum(item(quarterly, 'Net Income'))
+    ttm_ocf = trailing_sum(item(quarterly, 'Operating Cash Flow'))
+    ttm_capex = trailing_sum(np.abs(item(quarterly, 'Capital Expenditure')))
+
+    return {
+        'annual_periods': (~np.isnan(revenue)).sum(axis=1),
+        'quarterly_periods': (~np.isnan(q_revenue)).sum(axis=1),
+        'revenue_cagr_%': cagr(revenue),
+        'net_income_cagr_%': cagr(net_income),
+        'operating_cash_flow_cagr_%': cagr(item(annual, 'Operating Cash Flow')),
+        'revenue_growth_history': revenue_growth,
+        'revenue_growth_consistency': consistency,
+        'gross_margin_history': gross_margin,
+        'operating_margin_history': operating_margin,
+        'net_margin_history': net_margin,
+        'gross_margin_slope': trend_slope(gross_margin),
+        'operating_margin_slope': trend_slope(operating_margin),
+        'net_margin_slope': trend_slope(net_margin),
+        'ttm_revenue': ttm_revenue[:, 0] if ttm_revenue.shape[1] else np.full(n, np.nan),
+        'ttm_net_income': ttm_net_income[:, 0] if ttm_net_income.shape[1] else np.full(n, np.nan),
+        'ttm_operating_cash_flow': ttm_ocf[:, 0] if ttm_ocf.shape[1] else np.full(n, np.nan),
+        'ttm_free_cash_flow': (ttm_ocf - ttm_capex)[:, 0] if ttm_ocf.shape[1] else np.full(n, np.nan),
+        'ttm_revenue_history': ttm_revenue,
+        # نمو TTM مقابل الربع السابق (نافذة 4 أرباع متحركة) ومقابل نفس الفترة من العام الماضي
+        'rolling_4q_growth_%': _first_valid(period_growth(ttm_revenue, 1)),
+        'ttm_yoy_growth_%': _first_valid(period_growth(ttm_revenue, 4)),
+        'quarterly_yoy_growth_%': period_growth(q_revenue, 4)[:, 0] if q_revenue.shape[1] else np.full(n, np.nan),
+    }
+
+
+def score_trends(metrics: Dict[str, np.ndarray]):
+    """
+    درجة الاتجاه (0-100، تبدأ من 50) وتصنيفها من ناتج compute_trend_metrics.
+    المقاييس غير المتاحة (NaN) لا تضيف ولا تخصم.
+
+    Returns: (trend_score, trend_rating) كمصفوفتين (أسهم،)
+    """
+    cagr_rev = metrics['revenue_cagr_%']
+    consistency = metrics['revenue_growth_consistency']
+    net_slope = metrics['net_margin_slope']
+    gross_slope = metrics['gross_margin_slope']
+    # نمو TTM السنوي إن توفر، وإلا نمو آخر ربع مقابل نفس الربع من العام الماضي
+    recent = np.where(np.isnan(metrics['ttm_yoy_growth_%']),
+                      metrics['quarterly_yoy_growth_%'], metrics['ttm_yoy_growth_%'])
+    ttm_fcf = metrics['ttm_free_cash_flow']
+
+    score = (
+        50
+        + np.select([cagr_rev > 15, cagr_rev > 7, cagr_rev > 0, cagr_rev <= 0], [15, 10, 5, -10], 0)
+        + np.select([consistency >= 0.75, consistency < 0.5], [10, -5], 0)
+        + np.select([net_slope > 1, net_slope > 0, net_slope < -1, net_slope < 0], [10, 5, -10, -5], 0)
+        + np.select([gross_slope > 0, gross_slope < -1], [5, -5], 0)
+        + np.select([recent > 10, recent > 0, recent < -5], [10, 5, -10], 0)
+        + np.select([ttm_fcf > 0, ttm_fcf < 0], [5, -5], 0)
+    )
+    score = np.clip(score, 0, 100)
+    rating = np.select([score >= min_score for min_score, _ in TREND_TIERS[:-1]],
+                       [rating for _, rating in TREND_TIERS[:-1]], TREND_TIERS[-1][1])
+    return score, rating
@@ -2,21 +2,168 @@
 import pandas as pd
 import yfinance as yf
 
-def fetch_technical_data(symbol, start, end):
-    """Fetch historical stock data using yfinance."""
+import price_cache
+
+
+def _normalize_columns(data, symbol):
+    """توحيد أسماء الأعمدة بعد reset_index إلى Date/Close/High/Low/Open/Volume."""
+    data = data.reset_index()
+    # إعادة تسمية الأعمدة إن لزم لتحويلها:
+    if len(data.columns) == 6:
+        data.columns = ['Date', 'Close', 'High', 'Low', 'Open', 'Volume']
+    elif len(data.columns) == 7:
+        data.columns = ['Date', 'Close', 'High', 'Low', 'Open', 'Adj Close', 'Volume']
+    else:
+        raise ValueError(f"Unexpected data format for {symbol}: {len(data.columns)} columns")
+    return data
+
+
+def _download_failed(symbol):
+    """yfinance لا يرفع استثناء عند فشل السهم بل يسجله في shared._ERRORS ويعيد إطاراً فارغاً."""
+    errors = getattr(getattr(yf, 'shared', None), '_ERRORS', None) or {}
+    return symbol.upper() in {str(k).upper() for k in errors}
+
+
+def _download(symbol, start, end):
+    """
+    تحميل نطاق واحد من yfinance.
+    Returns: إطار فارغ عند نجاح الطلب بدون شموع (عطلة نهاية أسبوع/عطلة رسمية)،
+    و None عند فشل التحميل (خطأ شبكة أو حد طلبات).
+    """
     try:
         data = yf.download(symbol, start=start, end=end)
-        if data.empty:
-            raise ValueError(f"No data available for stock {symbol}. Check symbol, date range, or network connection.")
-        data = data.reset_index()
-        # إعادة تسمية الأعمدة إن لزم لتحويلها: 
-        if len(data.columns) == 6:
-            data.columns = ['Date', 'Close', 'High', 'Low', 'Open', 'Volume']
-        elif len(data.columns) == 7:
-            data.columns = ['Date', 'Close', 'High', 'Low', 'Open', 'Adj Close', 'Volume']
+    except Exception:
+        return None
+    if data is None or data.empty:
+        return None if data is None or _download_failed(symbol) else pd.DataFrame()
+    return _normalize_columns(data, symbol)
+
+
+def _fetch_with_cache(symbol, start, end):
+    """يقرأ من التخزين المحلي ويجلب النطاقات الناقصة فقط ثم يدمجها."""
+    try:
+        cached, coverage = price_cache.load_prices(symbol)
+    except Exception:
+        cached, coverage = None, None
+
+    gaps = price_cache.missing_ranges(coverage, start, end)
+    if not gaps:
+        return price_cache.slice_prices(cached, start, end)
+
+    downloads = [_download(symbol, gap_start, gap_end) for gap_start, gap_end in gaps]
+    fetched = [gap for gap, frame in zip(gaps, downloads) if frame is not None]
+    new_frames = [frame for frame in downloads if frame is not None]
+    return _merge_and_store(symbol, cached, coverage, new_frames, fetched, start, end)
+
+
+def _merge_and_store(symbol, cached, coverage, new_frames, fetched, start, end):
+    """
+    دمج ما تم تحميله مع المخزن وحفظه ثم إعادة النطاق المطلوب.
+
+    - fetched: النطاقات التي نجح تحميلها (حتى لو بلا شموع، مثل عطلة نهاية الأسبوع)؛
+      التغطية تتوسع عليها فقط، فلا يُعلَّم نطاق فشل تحميله كمغطى
+    """
+    merged = price_cache.merge_prices(cached, new_frames)
+    if merged.empty:
+        return merged
+
+    if fetched:
+        try:
+            price_cache.store_prices(symbol, merged, price_cache.update_coverage(coverage, fetched))
+        except Exception:
+            # فشل الكتابة لا يجب أن يوقف التحليل
+            pass
+    return price_cache.slice_prices(merged, start, end)
+
+
+def fetch_technical_data(symbol, start, end, use_cache=True):
+    """Fetch historical stock data using yfinance (through the local price cache by default)."""
+    try:
+        if use_cache:
+            data = _fetch_with_cache(symbol, start, end)
         else:
-            raise ValueError(f"Unexpected data format for {symbol}: {len(data.columns)} columns")
+            data = _download(symbol, start, end)
+        if data is None or data.empty:
+            raise ValueError(f"No data available for stock {symbol}. Check symbol, date range, or network connection.")
         data = data.dropna().reset_index(drop=True)
         return data
     except Exception as e:
-        raise ValueError(f"Error fetching data for {symbol}: {str(e)}")
\ No newline at end of file
+        raise ValueError(f"Error fetching data for {symbol}: {str(e)}")
+
+
+def _split_symbol(raw, symbol):
+    """استخراج إطار سهم واحد من نتيجة yf.download المجمّعة (MultiIndex)."""
+    if isinstance(raw.columns, pd.MultiIndex):
+        if symbol not in raw.columns.get_level_values(0):
+            return pd.DataFrame()
+        raw = raw[symbol]
+    data = raw.dropna(how='all')
+    if data.empty:
+        return pd.DataFrame()
+    # ترتيب الأعمدة بالاسم ليطابق ترتيب fetch_technical_data
+    ordered = [c for c in ['Close', 'High', 'Low', 'Open', 'Adj Close', 'Volume'] if c in data.columns]
+    return _normalize_columns(data[ordered], symbol)
+
+
+def fetch_technical_data_batch(symbols, start, end, use_cache=True):
+    """
+    Fetch historical data for many symbols with a single grouped yf.download call.
+
+    Returns:
+    - frames: dict symbol -> DataFrame بنفس أعمدة fetch_technical_data
+    - errors: dict symbol -> رسالة الخطأ (فشل سهم لا يوقف الدفعة)
+    """
+    symbols = list(dict.fromkeys(s.upper().strip() for s in symbols))
+    frames, errors = {}, {}
+
+    # (1) ما هو متوفر بالكامل في التخزين المحلي لا يحتاج تحميل
+    pending = {}
+    for symbol in symbols:
+        cached, coverage = None, None
+        if use_cache:
+            try:
+                cached, coverage = price_cache.load_prices(symbol)
+            except Exception:
+                cached, coverage = None, None
+        gaps = price_cache.missing_ranges(coverage, start, end)
+        if gaps:
+            pending[symbol] = (cached, coverage, gaps)
+        else:
+            data = price_cache.slice_prices(cached, start, end).dropna().reset_index(drop=True)
+            if data.empty:
+                errors[symbol] = f"Error fetching data for {symbol}: No data available for stock {symbol}."
+            else:
+                frames[symbol] = data
+
+    if not pending:
+        return frames, errors
+
+    # (2) طلب واحد يغطي كل النطاقات الناقصة لكل الأسهم المتبقية
+    span_start = min(gap[0] for _, _, gaps in pending.values() for gap in gaps)
+    span_end = max(gap[1] for _, _, gaps in pending.values() for gap in gaps)
+    try:
+        raw = yf.download(list(pending), start=span_start, end=span_end, group_by='ticker')
+    except Exception as e:
+        for symbol in pending:
+            errors[symbol] = f"Error fetching data for {symbol}: {str(e)}"
+        return frames, errors
+
+    # (3) تقسيم النتيجة لكل سهم مع عزل الأخطاء
+    for symbol, (cached, coverage, gaps) in pending.items():
+        try:
+            data = _split_symbol(raw, symbol)
+            if data.empty:
+                # السهم فشل داخل الطلب المجمّع (أعمدة NaN بالكامل): لا نعيد المخزن القديم
+                # ولا نحدّث تغطيته
+                raise ValueError(f"No data returned for {symbol} in the batch download.")
+            if use_cache:
+                data = _merge_and_store(symbol, cached, coverage, [data], gaps, start, end)
+            else:
+                data = price_cache.slice_prices(data, start, end)
+            if data.empty:
+                raise ValueError(f"No data available for stock {symbol}. Check symbol, date range, or network connection.")
+            frames[symbol] = data.dropna().reset_index(drop=True)
+        except Exception as e:
+            errors[symbol] = f"Error fetching data for {symbol}: {str(e)}"
+
+    return frames, errors
@@ -0,0 +1,233 @@
+# incremental_indicators.py
+import os
+import math
+import pickle
+from collections import deque
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from compute_indicators import SwingDetector
+from price_cache import CACHE_DIR
+
+STATE_CACHE_DIR = os.path.join(CACHE_DIR, 'indicator_state')
+
+
+def _ewm_step(prev: Optional[float], x: float, alpha: float) -> float:
+    """خطوة EWM (adjust=False) بنفس صيغة pandas حتى تتطابق القيم."""
+    if prev is None or prev != prev:
+        return x
+    if x != x or prev == x:
+        return prev
+    old_wt = 1.0 - alpha
+    return (old_wt * prev + alpha * x) / (old_wt + alpha)
+
+
+def _div(a: float, b: float) -> float:
+    """قسمة بسلوك NumPy (inf/NaN بدل ZeroDivisionError)."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return float(np.float64(a) / np.float64(b))
+
+
+def _window_mean(buf: deque, window: int) -> float:
+    """متوسط نافذة كاملة بدون NaN، وإلا NaN (مثل rolling(window).mean())."""
+    if len(buf) < window or any(v != v for v in buf):
+        return np.nan
+    return math.fsum(buf) / window
+
+
+def _signal(a: float, b: float) -> str:
+    if a > b:
+        return 'Buy'
+    if a < b:
+        return 'Sell'
+    return 'Hold'
+
+
+class IncrementalIndicators:
+    """
+    حالة المؤشرات لسهم واحد مع تحديث O(1) لكل شمعة جديدة.
+
+    ينتج نفس أعمدة calculate_technical_indicators (قبل dropna):
+    EMA/Wilder تُحدَّث بالتكرار، والمتوسطات المتحركة من نوافذ ثابتة الطول،
+    و OBV كمجموع جارٍ. Long_Resistance/Long_Support من SwingDetector حتى الشمعة
+    الحالية (عند آخر شمعة تساوي قيمة الحساب الكامل).
+    """
+
+    RSI_PERIODS = (7, 14, 21)
+
+    def __init__(self):
+        self.n = 0
+        self.last_date = None
+        self.prev_close = np.nan
+        self.prev_high = np.nan
+        self.prev_low = np.nan
+        # EMA / MACD
+        self.ema_12 = None
+        self.ema_26 = None
+        self.macd_signal = None
+        # Wilder RSI: متوسط الربح والخسارة لكل فترة
+        self.rsi_gain = {p: None for p in self.RSI_PERIODS}
+        self.rsi_loss = {p: None for p in self.RSI_PERIODS}
+        # نوافذ متحركة
+        self.closes = deque(maxlen=50)
+        self.highs = deque(maxlen=14)
+        self.lows = deque(maxlen=14)
+        self.stoch_k = deque(maxlen=3)
+        self.tr = deque(maxlen=14)
+        self.plus_dm = deque(maxlen=14)
+        self.minus_dm = deque(maxlen=14)
+        self.dx = deque(maxlen=14)
+        # OBV
+        self.obv = 0
+        # مستويات Swing
+        self.swings = SwingDetector(order=10)
+
+    @classmethod
+    def from_history(cls, df: pd.DataFrame) -> 'IncrementalIndicators':
+        """بناء الحالة من سجل كامل (مرة واحدة) ثم التحديث لاحقاً بالشموع الجديدة فقط."""
+        engine = cls()
+        for row in df.to_dict('records'):
+            engine.update(row)
+        return engine
+
+    def update(self, bar: Dict) -> Dict:
+        """
+        إضافة شمعة جديدة (Date, Open, High, Low, Close, Volume).
+        Returns: dict بالأعمدة المحسوبة لهذه الشمعة.
+        """
+        close, high, low = float(bar['Close']), float(bar['High']), float(bar['Low'])
+        volume = bar['Volume']
+        out = dict(bar)
+
+        # ----- RSI (Wilder) -----
+        delta = close - self.prev_close
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        count = self.n + 1
+        for p in self.RSI_PERIODS:
+            self.rsi_gain[p] = _ewm_step(self.rsi_gain[p], gain, 1 / p)
+            self.rsi_loss[p] = _ewm_step(self.rsi_loss[p], loss, 1 / p)
+            if count >= p:
+                out[f'RSI_{p}'] = 100 - _div(100, 1 + _div(self.rsi_gain[p], self.rsi_loss[p]))
+            else:
+                out[f'RSI_{p}'] = np.nan
+        out['RSI'] = out['RSI_21']
+
+        # ----- MACD -----
+        self.ema_12 = _ewm_step(self.ema_12, close, 2 / 13)
+        self.ema_26 = _ewm_step(self.ema_26, close, 2 / 27)
+        macd = self.ema_12 - self.ema_26
+        self.macd_signal = _ewm_step(self.macd_signal, macd, 2 / 10)
+        out['MACD'] = macd
+        out['MACD_Signal'] = self.macd_signal
+        out['MACD_Histogram'] = macd - self.macd_signal
+
+        # ----- Bollinger Bands / SMAs -----
+        self.closes.append(close)
+        last_20 = list(self.closes)[-20:]
+        if len(last_20) == 20:
+            middle = math.fsum(last_20) / 20
+            std = float(np.std(last_20, ddof=1))
+            out['BB_Middle'] = middle
+            out['BB_Upper'] = middle + 2 * std
+            out['BB_Lower'] = middle - 2 * std
+            out['Bollinger_%B'] = _div(close - out['BB_Lower'], out['BB_Upper'] - out['BB_Lower'])
+        else:
+            out['BB_Middle'] = out['BB_Upper'] = out['BB_Lower'] = out['Bollinger_%B'] = np.nan
+        out['EMA_signal'] = 'Golden Cross' if self.ema_12 > self.ema_26 else 'Death Cross'
+
+        # ----- True Range / ATR / DM -----
+        tr = np.fmax(abs(high - low), np.fmax(abs(high - self.prev_close), abs(low - self.prev_close)))
+        self.tr.append(float(tr))
+        valid_tr = [v for v in self.tr if v == v]
+        out['ATR_14'] = math.fsum(valid_tr) / len(valid_tr) if valid_tr else np.nan
+        atr = _window_mean(self.tr, 14)
+        plus_dm = high - self.prev_high
+        self.plus_dm.append(max(plus_dm, 0.0) if plus_dm == plus_dm else np.nan)
+        minus_dm = abs(low - self.prev_low)
+        self.minus_dm.append(minus_dm)
+        plus_di = 100 * _div(_window_mean(self.plus_dm, 14), atr)
+        minus_di = 100 * _div(_window_mean(self.minus_dm, 14), atr)
+        self.dx.append(_div(abs(plus_di - minus_di), plus_di + minus_di) * 100)
+        out['ADX'] = _window_mean(self.dx, 14)
+
+        # ----- OBV -----
+        prev_obv = self.obv
+        if close > self.prev_close:
+            self.obv += volume
+        elif close < self.prev_close:
+            self.obv -= volume
+        obv_change = self.obv - prev_obv if self.n > 0 else np.nan
+        out['OBV'] = self.obv
+
+        # ----- Pivot Points -----
+        pivot = (high + low + close) / 3
+        out['Pivot'] = pivot
+        out['R1'] = 2 * pivot - low
+        out['S1'] = 2 * pivot - high
+        out['R2'] = pivot + (high - low)
+        out['S2'] = pivot - (high - low)
+
+        # ----- Swing levels -----
+        self.swings.append(close)
+        out['Long_Resistance'] = self.swings.long_resistance
+        out['Long_Support'] = self.swings.long_support
+
+        # ----- Signals -----
+        out['MACD_Trade_Signal'] = _signal(macd, self.macd_signal)
+        out['OBV_Signal'] = _signal(obv_change, 0)
+        if close > out['BB_Upper']:
+            out['BB_Signal'] = 'Sell'
+        elif close < out['BB_Lower']:
+            out['BB_Signal'] = 'Buy'
+        else:
+            out['BB_Signal'] = 'Hold'
+        self.highs.append(high)
+        self.lows.append(low)
+        if len(self.highs) == 14:
+            low_min, high_max = min(self.lows), max(self.highs)
+            stoch_k = 100 * _div(close - low_min, high_max - low_min)
+        else:
+            stoch_k = np.nan
+        self.stoch_k.append(stoch_k)
+        stoch_d = _window_mean(self.stoch_k, 3)
+        out['Stoch_K'] = stoch_k
+        out['Stoch_D'] = stoch_d
+        out['Stoch_Signal'] = _signal(stoch_k, stoch_d)
+        out['Plus_DI'] = plus_di
+        out['Minus_DI'] = minus_di
+        out['ADX_Signal'] = _signal(plus_di, minus_di)
+        out['SMA_20'] = out['BB_Middle']
+        out['SMA_50'] = math.fsum(self.closes) / 50 if len(self.closes) == 50 else np.nan
+
+        self.prev_close, self.prev_high, self.prev_low = close, high, low
+        self.last_date = bar.get('Date')
+        self.n += 1
+        return out
+
+    def update_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """تحديث بعدة شموع جديدة (الأحدث من last_date فقط) وإرجاعها مع المؤشرات."""
+        if self.last_date is not None and 'Date' in df.columns:
+            df = df[df['Date'] > self.last_date]
+        rows = [self.update(row) for row in df.to_dict('records')]
+        return pd.DataFrame(rows)
+
+
+def save_state(symbol: str, engine: IncrementalIndicators):
+    """حفظ حالة المؤشرات للسهم على القرص."""
+    os.makedirs(STATE_CACHE_DIR, exist_ok=True)
+    with open(os.path.join(STATE_CACHE_DIR, f"{symbol.upper().strip()}.pkl"), 'wb') as f:
+        pickle.dump(engine, f)
+
+
+def load_state(symbol: str) -> Optional[IncrementalIndicators]:
+    """قراءة حالة المؤشرات المحفوظة، أو None إن لم توجد."""
+    path = os.path.join(STATE_CACHE_DIR, f"{symbol.upper().strip()}.pkl")
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        engine = pickle.load(f)
+    # حالة محفوظة بصيغة أقدم (قبل SwingDetector) تُعاد بناؤها من السجل
+    return engine if hasattr(engine, 'swings') else None
@@ -1,7 +1,8 @@
 
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Tuple, Any
+from typing import Dict, List, Tuple, Any, Optional
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from enum import Enum
 
@@ -11,7 +12,8 @@ from fetch_fundamental import fetch_fundamental_data
 from compute_indicators import calculate_technical_indicators
 from analyze_signals import analyze_technical_signals
 from analyze_financial import analyze_financial_performance
-from price_targets import calculate_price_targets
+from price_targets import LevelIndex, calculate_price_targets
+from signal_codes import decode_signal, signal_code
 
 
 # ===============================
@@ -556,12 +558,15 @@ def build_comprehensive_swot(decision, overall_score, avg_net_score, prediction,
     return analyzer.format_swot_simple(swot_analysis)
 
 
-def analyze_data(technical_data, fundamental_data, investment_amount, industry_pe, financial_analysis):
+def analyze_data(technical_data, fundamental_data, investment_amount, industry_pe, financial_analysis,
+                 compact_signals=False):
     """
     الدالة الرئيسية لتحليل البيانات الفنية والأساسية.
+    - compact_signals: أعمدة الإشارات في technical_data كرموز int8
+      (تُحوَّل لنصوص عبر signal_codes.decode_signal_columns عند العرض)
     """
     # 1) حساب المؤشرات الفنية
-    technical_data, fib_levels, sr_zones = calculate_technical_indicators(technical_data)
+    technical_data, fib_levels, sr_zones = calculate_technical_indicators(technical_data, compact=compact_signals)
     # تخزين مناطق الدعم/المقاومة في attrs للـ DataFrame
     technical_data.attrs['sr_zones'] = sr_zones
 
@@ -583,21 +588,7 @@ def analyze_data(technical_data, fundamental_data, investment_amount, industry_p
     volatility       = technical_data['Close'].pct_change().std() * 100
 
     # === ATR-14 لحساب وقف الخسارة المنطقي ===
-    high  = technical_data['High']
-    low   = technical_data['Low']
-    close = technical_data['Close']
-
-    true_ranges = pd.concat([
-        high - low,
-        (high - close.shift()).abs(),
-        (low  - close.shift()).abs()
-    ], axis=1)
-
-    technical_data['ATR_14'] = (
-        true_ranges.max(axis=1)
-        .rolling(window=14, min_periods=1)
-        .mean()
-    )
+    # (محسوب مسبقاً في calculate_technical_indicators من نفس True Range المستخدم في ADX)
     atr14 = technical_data['ATR_14'].iloc[-1]
 
 
@@ -605,16 +596,15 @@ def analyze_data(technical_data, fundamental_data, investment_amount, industry_p
     # توزيع الدرجات مرة واحدة لكل الداتا
     from analyze_signals import AdaptiveTechnicalSignalAnalyzer, SignalConfig
 
-    config = SignalConfig(enable_logging=False)
+    config = SignalConfig(enable_logging=False, compact_signals=compact_signals)
     analyzer = AdaptiveTechnicalSignalAnalyzer(config)
 
     # طبق توزيع النقاط على الداتا كاملة
     technical_data = analyzer.vectorized_signal_calculation(technical_data)
 
     # احسب الإشارة (Buy/Sell/Hold) مباشرة من Net_Score
-    technical_data['Signal'] = technical_data['Net_Score'].apply(
-        lambda x: 'Buy' if x > 0 else ('Sell' if x < 0 else 'Hold')
-    )
+    signal = signal_code(technical_data['Net_Score'] > 0, technical_data['Net_Score'] < 0)
+    technical_data['Signal'] = signal if compact_signals else decode_signal(signal, 'Signal')
 
     # بعد توزيع الدرجات وإضافة Important columns:
     # بعد توزيع الدرجات وإضافة Important columns:
@@ -696,87 +686,74 @@ def analyze_data(technical_data, fundamental_data, investment_amount, industry_p
 
 # 9) نقاط الدخول/الخروج/وقف الخسارة (محسَّنة جداً)
     # -------- 9-A) نقطة الدخول --------
-    entry_candidates = [
-        support_level,
-        fib_levels.get('Fib_61.8', support_level),
-        min(
+    buy_levels = LevelIndex({
+        'Support': support_level,
+        'Fib_61.8': fib_levels.get('Fib_61.8', support_level),
+        'SR_Zone': min(
             [z[0] for z in sr_zones
              if isinstance(z, (tuple, list)) and len(z) >= 2 and current_price > z[1]],
             default=support_level
         ),
-        current_data.get('Long_Support', support_level),
-        current_data.get('BB_Lower', support_level),
-    ]
-    entry_candidates = [
-        x for x in entry_candidates
-        if isinstance(x, (int, float)) and not pd.isna(x) and x > 0
-    ]
+        'Long_Support': current_data.get('Long_Support', support_level),
+        'BB_Lower': current_data.get('BB_Lower', support_level),
+    })
+    sell_levels = LevelIndex({
+        'Resistance': resistance_level,
+        'Fib_38.2': fib_levels.get('Fib_38.2', resistance_level),
+        'SR_Zone': max(
+            [z[1] for z in sr_zones
+             if isinstance(z, (tuple, list)) and len(z) >= 2 and current_price < z[0]],
+            default=resistance_level
+        ),
+        'Long_Resistance': current_data.get('Long_Resistance', resistance_level),
+        'BB_Upper': current_data.get('BB_Upper', resistance_level),
+    })
 
     if decision in ["Strong Sell", "Sell"]:
-        entry_candidates = [
-            resistance_level,
-            fib_levels.get('Fib_38.2', resistance_level),
-            max(
-                [z[1] for z in sr_zones
-                 if isinstance(z, (tuple, list)) and len(z) >= 2 and current_price < z[0]],
-                default=resistance_level
-            ),
-            current_data.get('Long_Resistance', resistance_level),
-            current_data.get('BB_Upper', resistance_level),
-        ]
-        entry_candidates = [
-            x for x in entry_candidates
-            if isinstance(x, (int, float)) and not pd.isna(x) and x > 0
-        ]
-
-    if decision in ["Strong Buy", "Buy"]:
-        entry_point = float(np.round(max(entry_candidates) if entry_candidates else current_price, 2))
-    elif decision in ["Strong Sell", "Sell"]:
-        entry_point = float(np.round(min(entry_candidates) if entry_candidates else current_price, 2))
-    else:  # Hold
-        # نعتمد أقرب مستوى دعم/مقاومة بدلاً من السعر الحالي
-        entry_point = float(np.round(max(entry_candidates) if entry_candidates else current_price, 2))
+        # أدنى مقاومة موجبة
+        entry = sell_levels.above(0, strict=True)
+    else:  # Buy أو Hold: أعلى دعم موجب
+        # (في Hold نعتمد أقرب مستوى دعم/مقاومة بدلاً من السعر الحالي)
+        entry = buy_levels.below(np.inf)
+        entry = entry if entry is not None and entry > 0 else None
+    entry_point = float(np.round(entry if entry is not None else current_price, 2))
 
     # -------- 9-B) نقطة الخروج --------
     if decision in ["Strong Buy", "Buy"]:
-        exit_candidates = [
-            up_targets[1] if len(up_targets) > 1 else
-            up_targets[0] if up_targets else current_price * 1.05,
-            resistance_level,
-            fib_levels.get('Fib_23.6', resistance_level),
-            current_data.get('Long_Resistance', resistance_level),
-            current_data.get('BB_Upper', resistance_level),
-            max(
+        exit_levels = LevelIndex({
+            'Target': up_targets[1] if len(up_targets) > 1 else
+                      up_targets[0] if up_targets else current_price * 1.05,
+            'Resistance': resistance_level,
+            'Fib_23.6': fib_levels.get('Fib_23.6', resistance_level),
+            'Long_Resistance': current_data.get('Long_Resistance', resistance_level),
+            'BB_Upper': current_data.get('BB_Upper', resistance_level),
+            'SR_Zone': max(
                 [z[1] for z in sr_zones
                  if isinstance(z, (tuple, list)) and len(z) >= 2 and z[1] > current_price],
                 default=resistance_level
-            )
-        ]
-        exit_candidates = [
-            x for x in exit_candidates
-            if isinstance(x, (int, float)) and not pd.isna(x) and x > entry_point
-        ]
-        exit_point = float(np.round(min(exit_candidates) if exit_candidates else current_price * 1.05, 2))
+            ),
+        })
+        # أقرب هدف فوق نقطة الدخول
+        exit_level = exit_levels.above(entry_point, strict=True)
+        exit_point = float(np.round(exit_level if exit_level is not None else current_price * 1.05, 2))
 
     elif decision in ["Strong Sell", "Sell"]:
-        exit_candidates = [
-            down_targets[1] if len(down_targets) > 1 else
-            down_targets[0] if down_targets else current_price * 0.95,
-            support_level,
-            fib_levels.get('Fib_78.6', support_level),
-            current_data.get('Long_Support', support_level),
-            current_data.get('BB_Lower', support_level),
-            min(
+        exit_levels = LevelIndex({
+            'Target': down_targets[1] if len(down_targets) > 1 else
+                      down_targets[0] if down_targets else current_price * 0.95,
+            'Support': support_level,
+            'Fib_78.6': fib_levels.get('Fib_78.6', support_level),
+            'Long_Support': current_data.get('Long_Support', support_level),
+            'BB_Lower': current_data.get('BB_Lower', support_level),
+            'SR_Zone': min(
                 [z[0] for z in sr_zones
                  if isinstance(z, (tuple, list)) and len(z) >= 2 and z[0] < current_price],
                 default=support_level
-            )
-        ]
-        exit_candidates = [
-            x for x in exit_candidates
-            if isinstance(x, (int, float)) and not pd.isna(x) and x < entry_point
-        ]
-        exit_point = float(np.round(max(exit_candidates) if exit_candidates else current_price * 0.95, 2))
+            ),
+        })
+        # أقرب هدف تحت نقطة الدخول
+        exit_level = exit_levels.below(entry_point, strict=True)
+        exit_point = float(np.round(exit_level if exit_level is not None else current_price * 0.95, 2))
     else:  # Hold
         exit_point = float(np.round(current_price, 2))
 
@@ -892,3 +869,66 @@ def analyze_data(technical_data, fundamental_data, investment_amount, industry_p
         'analyst_avg_target': analyst_avg_target
     }
 
+
+# ===============================
+# Batch Analysis (Process Pool)
+# ===============================
+
+# الحقول الكبيرة التي لا داعي لإعادتها من العمليات الفرعية (المستدعي يملكها أصلاً)
+_HEAVY_KEYS = ('technical_data', 'fundamental_data_full', 'financial_analysis', 'fundamental_info')
+
+
+def compact_analysis(analysis: Dict, tail_rows: int = 1) -> Dict:
+    """
+    نسخة مختصرة من نتيجة analyze_data: بدون الجداول الكبيرة،
+    مع آخر tail_rows صفوف فقط من البيانات الفنية.
+    """
+    compact = {k: v for k, v in analysis.items() if k not in _HEAVY_KEYS}
+    technical_data = analysis.get('technical_data')
+    if isinstance(technical_data, pd.DataFrame) and tail_rows > 0:
+        compact['technical_tail'] = technical_data.tail(tail_rows).reset_index(drop=True)
+    return compact
+
+
+def _analyze_data_worker(symbol, technical_data, fundamental_data, financial_analysis,
+                         investment_amount, industry_pe, tail_rows):
+    """يعمل داخل العملية الفرعية ويعيد (symbol, result, error) بدل رفع الاستثناء."""
+    try:
+        analysis = analyze_data(technical_data, fundamental_data, investment_amount,
+                                industry_pe, financial_analysis, compact_signals=True)
+        return symbol, compact_analysis(analysis, tail_rows), None
+    except Exception as e:
+        return symbol, None, str(e)
+
+
+def analyze_data_batch(
+    items: Dict[str, Tuple[pd.DataFrame, Dict, Dict]],
+    investment_amount: float,
+    industry_pe: Optional[float] = None,
+    max_workers: Optional[int] = None,
+    tail_rows: int = 1,
+) -> Tuple[Dict[str, Dict], Dict[str, str]]:
+    """
+    تشغيل analyze_data لعدة أسهم على ProcessPoolExecutor.
+
+    - items: dict symbol -> (technical_data, fundamental_data, financial_analysis)
+    - tail_rows: عدد صفوف البيانات الفنية المعادة في 'technical_tail' (إشارات int8)
+
+    Returns:
+    - results: dict symbol -> نتيجة مختصرة (compact_analysis)
+    - errors: dict symbol -> رسالة الخطأ (فشل سهم لا يوقف الباقي)
+    """
+    results, errors = {}, {}
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = [
+            pool.submit(_analyze_data_worker, symbol, technical_data, fundamental_data,
+                        financial_analysis, investment_amount, industry_pe, tail_rows)
+            for symbol, (technical_data, fundamental_data, financial_analysis) in items.items()
+        ]
+        for future in futures:
+            symbol, result, error = future.result()
+            if error is None:
+                results[symbol] = result
+            else:
+                errors[symbol] = error
+    return results, errors
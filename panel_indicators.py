@@ -0,0 +1,173 @@
+# panel_indicators.py
+import numpy as np
+import pandas as pd
+from typing import Dict
+
+
+def panel_from_frames(frames: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+    """
+    تحويل إطارات الأسهم (مثل ناتج fetch_technical_data_batch) إلى مصفوفات عريضة
+    (التواريخ × الأسهم) لكل من Close/High/Low/Volume.
+    """
+    panel = {}
+    for field in ('Close', 'High', 'Low', 'Volume'):
+        panel[field] = pd.DataFrame({
+            symbol: df.set_index('Date')[field] for symbol, df in frames.items()
+        }).sort_index()
+    return panel
+
+
+def _wide(values) -> pd.DataFrame:
+    return values if isinstance(values, pd.DataFrame) else pd.DataFrame(np.asarray(values, dtype=float))
+
+
+def _by_calendar(func, frames, *args):
+    """
+    تطبيق func على كل مجموعة أسهم تتداول في نفس التواريخ، على صفوفها الصالحة فقط،
+    ثم إعادة النتيجة إلى فهرس اللوحة الكامل (NaN حيث لا توجد شمعة للسهم).
+
+    اتحاد تواريخ كل الأسهم يترك صفوف NaN لسهم ينقصه يوم في منتصف تاريخه؛ حسابه
+    عليها مباشرة يضيّع التغير عبر الفجوة ويمد نوافذ rolling. التجميع حسب نمط
+    التواريخ يجعل كل سهم يُحسب كما في compute_indicators (بعد dropna)، ويبقى
+    الحساب متجهاً للأسهم ذات التقويم الموحد (الحالة المعتادة).
+    """
+    frames = [_wide(f) for f in frames]
+    index, columns = frames[0].index, frames[0].columns
+    valid = np.logical_and.reduce([f.notna().to_numpy() for f in frames])
+    if valid.all():
+        return func(*frames, *args)
+
+    groups = {}
+    for j in range(valid.shape[1]):
+        groups.setdefault(np.packbits(valid[:, j]).tobytes(), []).append(j)
+
+    parts = []
+    for positions in groups.values():
+        rows = valid[:, positions[0]]
+        if not rows.any():
+            continue
+        parts.append(func(*(f.iloc[rows, positions] for f in frames), *args))
+
+    def assemble(pieces):
+        if not pieces:
+            return pd.DataFrame(np.nan, index=index, columns=columns)
+        return pd.concat(pieces, axis=1).reindex(index=index, columns=columns)
+
+    if parts and isinstance(parts[0], dict):
+        return {key: assemble([part[key] for part in parts]) for key in parts[0]}
+    return assemble(parts)
+
+
+def _rsi(close: pd.DataFrame, period: int) -> pd.DataFrame:
+    delta = close.diff()
+    gain = delta.where(delta > 0, 0).where(close.notna())
+    loss = (-delta.where(delta < 0, 0)).where(close.notna())
+    avg_gain = gain.ewm(alpha=1/period, min_periods=period, adjust=False).mean()
+    avg_loss = loss.ewm(alpha=1/period, min_periods=period, adjust=False).mean()
+    rs = avg_gain / avg_loss
+    return 100 - (100 / (1 + rs))
+
+
+def panel_rsi(close, period: int = 14) -> pd.DataFrame:
+    """RSI بطريقة Wilder لكل الأعمدة دفعة واحدة (نفس compute_rsi_wilder)."""
+    return _by_calendar(_rsi, [close], period)
+
+
+def _macd(close: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    macd = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+    signal = macd.ewm(span=9, adjust=False).mean()
+    return {'MACD': macd, 'MACD_Signal': signal, 'MACD_Histogram': macd - signal}
+
+
+def panel_macd(close) -> Dict[str, pd.DataFrame]:
+    return _by_calendar(_macd, [close])
+
+
+def _bollinger(close: pd.DataFrame, window: int) -> Dict[str, pd.DataFrame]:
+    middle = close.rolling(window).mean()
+    std = close.rolling(window).std()
+    upper = middle + 2 * std
+    lower = middle - 2 * std
+    return {
+        'BB_Middle': middle,
+        'BB_Upper': upper,
+        'BB_Lower': lower,
+        'Bollinger_%B': (close - lower) / (upper - lower),
+    }
+
+
+def panel_bollinger(close, window: int = 20) -> Dict[str, pd.DataFrame]:
+    return _by_calendar(_bollinger, [close], window)
+
+
+def _stochastic(high: pd.DataFrame, low: pd.DataFrame, close: pd.DataFrame, period: int) -> Dict[str, pd.DataFrame]:
+    low_min = low.rolling(period).min()
+    high_max = high.rolling(period).max()
+    stoch_k = 100 * (close - low_min) / (high_max - low_min)
+    return {'Stoch_K': stoch_k, 'Stoch_D': stoch_k.rolling(3).mean()}
+
+
+def panel_stochastic(high, low, close, period: int = 14) -> Dict[str, pd.DataFrame]:
+    return _by_calendar(_stochastic, [high, low, close], period)
+
+
+def _adx(high: pd.DataFrame, low: pd.DataFrame, close: pd.DataFrame, period: int) -> Dict[str, pd.DataFrame]:
+    h, l = high.to_numpy(dtype=float), low.to_numpy(dtype=float)
+    prev_close = close.shift().to_numpy(dtype=float)
+    tr = pd.DataFrame(
+        np.fmax(np.abs(h - l), np.fmax(np.abs(h - prev_close), np.abs(l - prev_close))),
+        index=close.index, columns=close.columns
+    )
+    atr = tr.rolling(window=period).mean()
+    plus_dm = high.diff().clip(lower=0)
+    minus_dm = low.diff().abs().clip(lower=0)
+    plus_di = 100 * (plus_dm.rolling(window=period).mean() / atr)
+    minus_di = 100 * (minus_dm.rolling(window=period).mean() / atr)
+    dx = (abs(plus_di - minus_di) / (plus_di + minus_di)) * 100
+    return {
+        'ADX': dx.rolling(window=period).mean(),
+        'Plus_DI': plus_di,
+        'Minus_DI': minus_di,
+        'ATR_14': tr.rolling(window=14, min_periods=1).mean(),
+    }
+
+
+def panel_adx(high, low, close, period: int = 14) -> Dict[str, pd.DataFrame]:
+    """ADX و DI لكل الأعمدة (نفس compute_true_range / calculate_adx)."""
+    return _by_calendar(_adx, [high, low, close], period)
+
+
+def _obv(close: pd.DataFrame, volume: pd.DataFrame) -> pd.DataFrame:
+    c = close.to_numpy(dtype=float)
+    v = volume.to_numpy(dtype=float)
+    signed = np.zeros_like(v)
+    signed[1:] = np.where(c[1:] > c[:-1], v[1:], np.where(c[1:] < c[:-1], -v[1:], 0))
+    return pd.DataFrame(np.cumsum(signed, axis=0), index=close.index, columns=close.columns)
+
+
+def panel_obv(close, volume) -> pd.DataFrame:
+    """OBV لكل الأعمدة كمجموع تراكمي للحجم الموقّع (نفس compute_obv)."""
+    return _by_calendar(_obv, [close, volume])
+
+
+def compute_panel_indicators(close, high, low, volume) -> Dict[str, pd.DataFrame]:
+    """
+    حساب RSI و MACD و Bollinger و Stochastics و ADX و OBV لمصفوفات
+    (التواريخ × الأسهم) في تمريرة واحدة متجهة لكل مؤشر بدلاً من حلقة على الأسهم.
+    كل سهم يُحسب على تواريخه الصالحة فقط (راجع _by_calendar)، فالفجوات في منتصف
+    التاريخ لا تغير النتيجة.
+
+    Returns: dict اسم المؤشر -> DataFrame (التواريخ × الأسهم)
+    """
+    close, high, low, volume = _wide(close), _wide(high), _wide(low), _wide(volume)
+    result = {
+        'RSI_7': panel_rsi(close, 7),
+        'RSI_14': panel_rsi(close, 14),
+        'RSI_21': panel_rsi(close, 21),
+    }
+    result.update(panel_macd(close))
+    result.update(panel_bollinger(close))
+    result.update(panel_stochastic(high, low, close))
+    result.update(panel_adx(high, low, close))
+    result['OBV'] = panel_obv(close, volume)
+    return result
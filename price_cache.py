@@ -0,0 +1,116 @@
+# price_cache.py
+import os
+import json
+import pandas as pd
+from datetime import date
+from typing import List, Optional, Tuple
+
+# مجلد التخزين المحلي (يمكن تغييره عبر متغير البيئة)
+CACHE_DIR = os.environ.get(
+    'STOCK_ANALYZER_CACHE',
+    os.path.join(os.path.expanduser('~'), '.stock_analyzer_cache')
+)
+PRICE_CACHE_DIR = os.path.join(CACHE_DIR, 'prices')
+
+# التغطية: قائمة فترات [start, end) مرتبة وغير متداخلة
+Coverage = List[Tuple[pd.Timestamp, pd.Timestamp]]
+
+
+def _symbol_paths(symbol: str) -> Tuple[str, str]:
+    """مسار ملف Parquet وملف التغطية (JSON) لكل سهم."""
+    name = symbol.upper().strip().replace('/', '_')
+    return (
+        os.path.join(PRICE_CACHE_DIR, f"{name}.parquet"),
+        os.path.join(PRICE_CACHE_DIR, f"{name}.json"),
+    )
+
+
+def load_prices(symbol: str) -> Tuple[Optional[pd.DataFrame], Optional[Coverage]]:
+    """
+    يقرأ بيانات OHLCV المخزنة للسهم مع فترات التغطية [start, end).
+    Returns (None, None) إذا لم يوجد تخزين سابق.
+    """
+    data_path, meta_path = _symbol_paths(symbol)
+    if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+        return None, None
+    with open(meta_path, 'r') as f:
+        meta = json.load(f)
+    data = pd.read_parquet(data_path)
+    # الصيغة القديمة: فترة واحدة start/end
+    intervals = meta.get('intervals', [[meta['start'], meta['end']]] if 'start' in meta else [])
+    coverage = [(pd.Timestamp(s), pd.Timestamp(e)) for s, e in intervals]
+    return data, coverage
+
+
+def store_prices(symbol: str, data: pd.DataFrame, coverage: Coverage):
+    """يحفظ بيانات السهم وفترات التغطية."""
+    os.makedirs(PRICE_CACHE_DIR, exist_ok=True)
+    data_path, meta_path = _symbol_paths(symbol)
+    data.to_parquet(data_path, index=False)
+    with open(meta_path, 'w') as f:
+        json.dump({'intervals': [[s.isoformat(), e.isoformat()] for s, e in coverage]}, f)
+
+
+def missing_ranges(coverage: Optional[Coverage], start, end) -> Coverage:
+    """
+    النطاقات الناقصة من [start, end) مقارنة بكل فترات التغطية المخزنة
+    (بما فيها الفجوات بين فترتين).
+    """
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    gaps = []
+    cursor = start
+    for cov_start, cov_end in sorted(coverage or []):
+        if cov_end <= cursor:
+            continue
+        if cov_start >= end:
+            break
+        if cov_start > cursor:
+            gaps.append((cursor, cov_start))
+        cursor = max(cursor, cov_end)
+    if cursor < end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+def merge_prices(cached: Optional[pd.DataFrame], new_frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """دمج البيانات الجديدة مع المخزنة (القيم الأحدث تتقدم عند تكرار التاريخ)."""
+    frames = [f for f in ([cached] if cached is not None else []) + new_frames if f is not None and not f.empty]
+    if not frames:
+        return pd.DataFrame()
+    # في حال اختلاف الأعمدة (مثلاً Adj Close) نحتفظ بالأعمدة المشتركة فقط
+    common = [c for c in frames[0].columns if all(c in f.columns for f in frames)]
+    merged = pd.concat([f[common] for f in frames], ignore_index=True)
+    merged['Date'] = pd.to_datetime(merged['Date'])
+    merged = (
+        merged.drop_duplicates(subset='Date', keep='last')
+        .sort_values('Date')
+        .reset_index(drop=True)
+    )
+    return merged
+
+
+def update_coverage(coverage: Optional[Coverage], fetched: Coverage) -> Coverage:
+    """
+    إضافة النطاقات التي تم جلبها فعلاً إلى التغطية ودمج المتداخل/المتلاصق منها.
+    لا نعتبر اليوم الحالي مغطى لأن شمعته لم تكتمل بعد.
+    """
+    today = pd.Timestamp(date.today())
+    intervals = list(coverage or [])
+    for start, end in fetched:
+        start, end = pd.Timestamp(start), min(pd.Timestamp(end), today)
+        if end > start:
+            intervals.append((start, end))
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def slice_prices(data: pd.DataFrame, start, end) -> pd.DataFrame:
+    """اقتطاع [start, end) من البيانات المخزنة."""
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    mask = (data['Date'] >= start) & (data['Date'] < end)
+    return data.loc[mask].reset_index(drop=True)
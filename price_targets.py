@@ -1,5 +1,73 @@
 import numpy as np
-from typing import Dict, List, Tuple, Optional
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Tuple, Optional
+
+
+class LevelIndex:
+    """
+    مستويات سعرية مرتبة مع استعلام أقرب مستوى فوق/تحت سعر معيّن عبر bisect (O(log n)).
+    المستويات مقسمة إلى طبقات أولوية: SHORT ثم LONG ثم OTHER (باقي الحقول).
+    """
+
+    SHORT, LONG, OTHER = 0, 1, 2
+
+    def __init__(self, levels: Dict[str, float] = None):
+        self._tiers = {self.SHORT: [], self.LONG: [], self.OTHER: []}
+        for name, value in (levels or {}).items():
+            self.add(name, value)
+
+    @classmethod
+    def tier_of(cls, name: str) -> int:
+        name = name.lower()
+        if name.startswith('short'):
+            return cls.SHORT
+        if name.startswith('long'):
+            return cls.LONG
+        return cls.OTHER
+
+    def add(self, name: str, value, tier: Optional[int] = None):
+        """إضافة مستوى (القيم غير الرقمية أو NaN تُتجاهل)."""
+        if not isinstance(value, (int, float)) or value != value:
+            return
+        tier = self.tier_of(name) if tier is None else tier
+        values = self._tiers[tier]
+        values.insert(bisect_right(values, value), value)
+
+    def __len__(self) -> int:
+        return sum(len(values) for values in self._tiers.values())
+
+    def above(self, threshold: float, strict: bool = False, tiers: Iterable[int] = None) -> Optional[float]:
+        """أقرب مستوى >= threshold (أو > عند strict) ضمن الطبقات المحددة، وإلا None."""
+        if threshold != threshold:
+            return None
+        best = None
+        for tier in tiers or self._tiers:
+            values = self._tiers[tier]
+            i = (bisect_right if strict else bisect_left)(values, threshold)
+            if i < len(values) and (best is None or values[i] < best):
+                best = values[i]
+        return best
+
+    def below(self, threshold: float, strict: bool = False, tiers: Iterable[int] = None) -> Optional[float]:
+        """أقرب مستوى <= threshold (أو < عند strict) ضمن الطبقات المحددة، وإلا None."""
+        if threshold != threshold:
+            return None
+        best = None
+        for tier in tiers or self._tiers:
+            values = self._tiers[tier]
+            i = (bisect_left if strict else bisect_right)(values, threshold) - 1
+            if i >= 0 and (best is None or values[i] > best):
+                best = values[i]
+        return best
+
+    def prioritized(self, threshold: float, above: bool = True) -> Optional[float]:
+        """أقرب مستوى في طبقة SHORT، ثم LONG، ثم أقرب مستوى من باقي الحقول."""
+        find = self.above if above else self.below
+        for tier in (self.SHORT, self.LONG, self.OTHER):
+            level = find(threshold, tiers=(tier,))
+            if level is not None:
+                return level
+        return None
 
 def calculate_price_targets(
     current_price: float,
@@ -60,23 +128,12 @@ def calculate_price_targets(
                 down_candidates[f"SR_{zone}"] = zone
 
     # ===== ترتيب الحقول حسب الأولوية (short/long أولاً) =====
-    def _prioritized_levels(levels_dict: Dict[str, float], threshold: float, above=True):
-        # أولوية: Short > Long > باقي الحقول
-        priority_keys = ['Short_Resistance', 'Long_Resistance'] if above else ['Short_Support', 'Long_Support']
-        # جرّب أولاً الحقول ذات الأولوية (وتكون رقمية وصحيحة)
-        for key in priority_keys:
-            val = levels_dict.get(key)
-            if isinstance(val, (int, float)):
-                if (above and val >= threshold) or (not above and val <= threshold):
-                    return val
-        # بعدها، جرب باقي الحقول كالمعتاد
-        candidates = [
-            lvl for k, lvl in levels_dict.items()
-            if isinstance(lvl, (int, float)) and ((above and lvl >= threshold) or (not above and lvl <= threshold)) and k not in priority_keys
-        ]
-        if not candidates:
-            return None
-        return min(candidates) if above else max(candidates)
+    up_index = LevelIndex(up_candidates)
+    down_index = LevelIndex(down_candidates)
+
+    def _prioritized_levels(index: LevelIndex, threshold: float, above=True):
+        # أولوية: Short > Long > أقرب مستوى من باقي الحقول
+        return index.prioritized(threshold, above=above)
 
     # ===== 1) حساب نسب الأهداف =====
     pct1, pct2, pct3 = _pct_levels(volatility)
@@ -89,13 +146,13 @@ def calculate_price_targets(
         # ---- أهداف صعودية ----
         raw_up_targets.append(current_price * (1 + pct1))
         thr2 = current_price * (1 + pct1)
-        lvl2 = _prioritized_levels(up_candidates, thr2, above=True)
+        lvl2 = _prioritized_levels(up_index, thr2, above=True)
         if lvl2 is None:
             raw_up_targets.append(current_price * (1 + pct2))
         else:
             raw_up_targets.append(max(thr2, lvl2))
         thr3 = current_price * (1 + pct2)
-        lvl3 = _prioritized_levels(up_candidates, thr3, above=True)
+        lvl3 = _prioritized_levels(up_index, thr3, above=True)
         if lvl3 is None:
             raw_up_targets.append(current_price * (1 + pct3))
         else:
@@ -103,13 +160,13 @@ def calculate_price_targets(
         # ---- أهداف هبوطية (وقف الخسارة) ----
         raw_down_targets.append(current_price * (1 - pct1))
         thr2d = current_price * (1 - pct1)
-        lvl2d = _prioritized_levels(down_candidates, thr2d, above=False)
+        lvl2d = _prioritized_levels(down_index, thr2d, above=False)
         if lvl2d is None:
             raw_down_targets.append(current_price * (1 - pct2))
         else:
             raw_down_targets.append(min(thr2d, lvl2d))
         thr3d = current_price * (1 - pct2)
-        lvl3d = _prioritized_levels(down_candidates, thr3d, above=False)
+        lvl3d = _prioritized_levels(down_index, thr3d, above=False)
         if lvl3d is None:
             raw_down_targets.append(current_price * (1 - pct3))
         else:
@@ -119,13 +176,13 @@ def calculate_price_targets(
         # ---- أهداف هبوطية ----
         raw_down_targets.append(current_price * (1 - pct1))
         thr2d = current_price * (1 - pct1)
-        lvl2d = _prioritized_levels(down_candidates, thr2d, above=False)
+        lvl2d = _prioritized_levels(down_index, thr2d, above=False)
         if lvl2d is None:
             raw_down_targets.append(current_price * (1 - pct2))
         else:
             raw_down_targets.append(min(thr2d, lvl2d))
         thr3d = current_price * (1 - pct2)
-        lvl3d = _prioritized_levels(down_candidates, thr3d, above=False)
+        lvl3d = _prioritized_levels(down_index, thr3d, above=False)
         if lvl3d is None:
             raw_down_targets.append(current_price * (1 - pct3))
         else:
@@ -133,13 +190,13 @@ def calculate_price_targets(
         # ---- أهداف صعودية (وقف خسارة عكسي) ----
         raw_up_targets.append(current_price * (1 + pct1))
         thr2 = current_price * (1 + pct1)
-        lvl2 = _prioritized_levels(up_candidates, thr2, above=True)
+        lvl2 = _prioritized_levels(up_index, thr2, above=True)
         if lvl2 is None:
             raw_up_targets.append(current_price * (1 + pct2))
         else:
             raw_up_targets.append(max(thr2, lvl2))
         thr3 = current_price * (1 + pct2)
-        lvl3 = _prioritized_levels(up_candidates, thr3, above=True)
+        lvl3 = _prioritized_levels(up_index, thr3, above=True)
         if lvl3 is None:
             raw_up_targets.append(current_price * (1 + pct3))
         else:
@@ -156,3 +213,112 @@ def calculate_price_targets(
     down_targets = [round(t, 4) for t in raw_down_targets]
 
     return up_targets, down_targets
+
+
+def _nearest_levels(levels: np.ndarray, priority: np.ndarray, threshold: np.ndarray, above: bool) -> np.ndarray:
+    """
+    نسخة متجهة من _prioritized_levels: لكل صف أول مستوى أولوية يحقق الشرط،
+    وإلا أقرب مستوى عادي (الأصغر فوق الحد أو الأكبر تحته)، وإلا NaN.
+    """
+    thr = threshold[:, None]
+    rows = np.arange(len(threshold))
+    ok = priority >= thr if above else priority <= thr
+    first = priority[rows, ok.argmax(axis=1)] if priority.shape[1] else np.full(len(threshold), np.nan)
+    ok_levels = levels >= thr if above else levels <= thr
+    if above:
+        nearest = np.min(np.where(ok_levels, levels, np.inf), axis=1, initial=np.inf)
+    else:
+        nearest = np.max(np.where(ok_levels, levels, -np.inf), axis=1, initial=-np.inf)
+    nearest = np.where(np.isinf(nearest), np.nan, nearest)
+    return np.where(ok.any(axis=1), first, nearest)
+
+
+def calculate_price_targets_batch(
+    current_price,
+    volatility,
+    bb_upper=None,
+    bb_lower=None,
+    resistance=None,
+    support=None,
+    short_resistance=None,
+    long_resistance=None,
+    short_support=None,
+    long_support=None,
+    fib_levels: Dict[str, np.ndarray] = None,
+    pivot_levels: Dict[str, np.ndarray] = None,
+    sr_levels=None,
+    trend_prediction=None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    نسخة متجهة من calculate_price_targets لعدة صفوف (تواريخ سهم واحد أو عدة أسهم) دفعة واحدة.
+
+    كل مدخل مصفوفة بطول n (أو قيمة واحدة تُعمَّم على كل الصفوف)؛ القيمة المفقودة NaN أو None.
+    - fib_levels / pivot_levels: dict اسم المستوى -> مصفوفة
+    - sr_levels: مصفوفة (n, k) بمستويات SR إضافية كأرقام مفردة
+    - trend_prediction: مصفوفة نصوص ('Strong Uptrend' / 'Strong Downtrend' / غير ذلك)
+
+    Returns:
+    - up_targets, down_targets: مصفوفتان (n, 3)؛ الهدف الثالث NaN في الاتجاه الجانبي
+      (نفس قيم calculate_price_targets ضمن دقة التقريب لأربع خانات)
+    """
+    price = np.atleast_1d(np.asarray(current_price, dtype=float))
+    n = len(price)
+
+    def col(values):
+        if values is None:
+            return np.full(n, np.nan)
+        return np.broadcast_to(np.asarray(values, dtype=float), (n,))
+
+    fib_levels = fib_levels or {}
+    pivot_levels = pivot_levels or {}
+    trend = np.broadcast_to(np.asarray(trend_prediction if trend_prediction is not None else "Sideways"), (n,))
+    sr = np.empty((n, 0)) if sr_levels is None else np.asarray(sr_levels, dtype=float).reshape(n, -1)
+
+    # ===== المرشحون: الأولوية (Short ثم Long) وباقي الحقول =====
+    up_priority = np.column_stack([col(short_resistance), col(long_resistance)])
+    down_priority = np.column_stack([col(short_support), col(long_support)])
+    up_levels = np.column_stack(
+        [col(bb_upper), col(resistance)]
+        + [col(fib_levels[k]) for k in ['Fib_23.6', 'Fib_38.2'] if k in fib_levels]
+        + [col(pivot_levels[k]) for k in ['R1', 'R2'] if k in pivot_levels]
+        + [np.where(sr >= price[:, None], sr, np.nan)]
+    )
+    down_levels = np.column_stack(
+        [col(bb_lower), col(support)]
+        + [col(fib_levels[k]) for k in ['Fib_61.8', 'Fib_78.6'] if k in fib_levels]
+        + [col(pivot_levels[k]) for k in ['S1', 'S2'] if k in pivot_levels]
+        + [np.where(sr <= price[:, None], sr, np.nan)]
+    )
+
+    # ===== نسب الأهداف =====
+    pct1 = np.fmax(0.02, col(volatility) / 100)
+    pct2 = pct1 + 0.03
+    pct3 = pct2 + 0.05
+
+    # ===== أهداف مبنية على المستويات (Strong Uptrend / Strong Downtrend) =====
+    thr2, thr3 = price * (1 + pct1), price * (1 + pct2)
+    lvl2 = _nearest_levels(up_levels, up_priority, thr2, above=True)
+    lvl3 = _nearest_levels(up_levels, up_priority, thr3, above=True)
+    up_strong = np.column_stack([
+        thr2,
+        np.where(np.isnan(lvl2), price * (1 + pct2), np.maximum(thr2, lvl2)),
+        np.where(np.isnan(lvl3), price * (1 + pct3), np.maximum(thr3, lvl3)),
+    ])
+    thr2d, thr3d = price * (1 - pct1), price * (1 - pct2)
+    lvl2d = _nearest_levels(down_levels, down_priority, thr2d, above=False)
+    lvl3d = _nearest_levels(down_levels, down_priority, thr3d, above=False)
+    down_strong = np.column_stack([
+        thr2d,
+        np.where(np.isnan(lvl2d), price * (1 - pct2), np.minimum(thr2d, lvl2d)),
+        np.where(np.isnan(lvl3d), price * (1 - pct3), np.minimum(thr3d, lvl3d)),
+    ])
+
+    # ===== الاتجاه الجانبي: هدفان بالنسب فقط =====
+    nan = np.full(n, np.nan)
+    up_side = np.column_stack([thr2, thr3, nan])
+    down_side = np.column_stack([thr2d, thr3d, nan])
+
+    strong = np.isin(trend, ["Strong Uptrend", "Strong Downtrend"])[:, None]
+    up_targets = np.round(np.where(strong, up_strong, up_side), 4)
+    down_targets = np.round(np.where(strong, down_strong, down_side), 4)
+    return up_targets, down_targets
@@ -6,6 +6,8 @@ from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 from openpyxl.utils.dataframe import dataframe_to_rows
 import os
 
+from signal_codes import decode_signal_columns
+
 
 def save_report(analysis, symbol, download_path):
     """Save analysis results to an Excel file with improved formatting."""
@@ -56,6 +58,8 @@ def save_report(analysis, symbol, download_path):
 
         # —— نظّف كامل الأعمدة من أي NaN قبل التصدير ——
         technical_df = technical_df.dropna(how='any').reset_index(drop=True)
+        # تحويل أعمدة الإشارات المرمّزة (int8) إلى تسميات
+        technical_df = decode_signal_columns(technical_df)
 
         if not technical_df.empty:
             cols_to_export = [
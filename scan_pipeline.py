@@ -0,0 +1,132 @@
+# scan_pipeline.py
+import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Dict, Iterable, Optional, Tuple
+
+from import_fetch_technical import fetch_technical_data
+from fetch_fundamental import fetch_fundamental_data
+from analysis_cache import cached_financial_performance
+from main_analysis import analyze_data, compact_analysis
+from save_to_excel import save_report
+
+
+def _fetch_symbol(symbol, start, end):
+    """جلب البيانات الفنية والأساسية لسهم واحد (عمل I/O)."""
+    technical_data = fetch_technical_data(symbol, start, end)
+    fundamental_data, message = fetch_fundamental_data(symbol)
+    if fundamental_data is None:
+        raise ValueError(message)
+    return technical_data, fundamental_data
+
+
+def _analyze_symbol(symbol, technical_data, fundamental_data, investment_amount, industry_pe,
+                    report_dir=None, tail_rows=1):
+    """
+    نفس تسلسل ui.py: التحليل المالي ثم التحليل الرئيسي ثم التقرير (عمل CPU).
+    دالة على مستوى الموديول حتى يمكن إرسالها إلى ProcessPoolExecutor.
+    تعيد compact_analysis حتى لا تُنقل الجداول الكبيرة عبر حدود العملية.
+    """
+    financial_analysis = cached_financial_performance(
+        fundamental_data["financials"],
+        fundamental_data["balance_sheet"],
+        fundamental_data["cashflow"],
+        fundamental_data["quarterly_financials"],
+        fundamental_data["quarterly_balance_sheet"],
+        fundamental_data["quarterly_cashflow"],
+        fundamental_data["basic_info"],
+        industry_pe,
+        use_disk=True,
+    )
+    analysis = analyze_data(
+        technical_data,
+        fundamental_data,
+        investment_amount,
+        industry_pe,
+        financial_analysis,
+    )
+    if report_dir:
+        analysis['excel_file'] = save_report(analysis, symbol, report_dir)
+    return compact_analysis(analysis, tail_rows)
+
+
+async def scan_universe(
+    symbols: Iterable[str],
+    start,
+    end,
+    investment_amount: float = 10000,
+    industry_pe: Optional[float] = None,
+    max_fetch_concurrency: int = 16,
+    max_analysis_workers: Optional[int] = None,
+    queue_size: int = 64,
+    report_dir: Optional[str] = None,
+    tail_rows: int = 1,
+) -> Tuple[Dict[str, dict], Dict[str, str]]:
+    """
+    تحليل قائمة أسهم مع تداخل الجلب الشبكي والتحليل الحسابي.
+
+    - الجلب: max_fetch_concurrency عاملاً ثابتاً يسحب كل منها الأسهم من قائمة العمل (ThreadPool)
+    - التحليل: max_analysis_workers عملية (ProcessPool)
+    - queue_size: حد الطابور بين المرحلتين؛ عند امتلائه يتوقف الجلب (back-pressure)،
+      فلا تتجاوز البيانات المجلوبة غير المحللة queue_size + max_fetch_concurrency
+      + max_analysis_workers سهماً
+
+    Returns:
+    - results: dict symbol -> compact_analysis (مع آخر tail_rows صفوف فنية)
+    - errors: dict symbol -> رسالة الخطأ
+    """
+    symbols = list(dict.fromkeys(s.upper().strip() for s in symbols))
+    max_analysis_workers = max_analysis_workers or os.cpu_count() or 1
+    loop = asyncio.get_running_loop()
+    results, errors = {}, {}
+    queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    pending: asyncio.Queue = asyncio.Queue()
+    for symbol in symbols:
+        pending.put_nowait(symbol)
+
+    with ThreadPoolExecutor(max_workers=max_fetch_concurrency) as io_pool, \
+            ProcessPoolExecutor(max_workers=max_analysis_workers) as cpu_pool:
+
+        async def fetch():
+            while not pending.empty():
+                symbol = pending.get_nowait()
+                try:
+                    technical_data, fundamental_data = await loop.run_in_executor(
+                        io_pool, _fetch_symbol, symbol, start, end
+                    )
+                except Exception as e:
+                    errors[symbol] = str(e)
+                    continue
+                # العامل لا يجلب السهم التالي حتى يجد مكاناً في الطابور (back-pressure)
+                await queue.put((symbol, technical_data, fundamental_data))
+
+        async def analyze():
+            while True:
+                item = await queue.get()
+                try:
+                    if item is None:
+                        return
+                    symbol, technical_data, fundamental_data = item
+                    try:
+                        results[symbol] = await loop.run_in_executor(
+                            cpu_pool, _analyze_symbol, symbol, technical_data, fundamental_data,
+                            investment_amount, industry_pe, report_dir, tail_rows
+                        )
+                    except Exception as e:
+                        errors[symbol] = str(e)
+                finally:
+                    queue.task_done()
+
+        analyzers = [asyncio.create_task(analyze()) for _ in range(max_analysis_workers)]
+        fetchers = [asyncio.create_task(fetch()) for _ in range(min(max_fetch_concurrency, len(symbols)))]
+        await asyncio.gather(*fetchers)
+        for _ in analyzers:
+            await queue.put(None)
+        await asyncio.gather(*analyzers)
+
+    return results, errors
+
+
+def run_universe_scan(symbols: Iterable[str], start, end, **kwargs) -> Tuple[Dict[str, dict], Dict[str, str]]:
+    """غلاف متزامن لـ scan_universe."""
+    return asyncio.run(scan_universe(symbols, start, end, **kwargs))
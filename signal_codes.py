@@ -0,0 +1,59 @@
+# signal_codes.py
+import numpy as np
+import pandas as pd
+
+# كل عمود إشارة: (تسمية ‎+1، تسمية ‎-1، تسمية 0)
+TRADE_LABELS = ('Buy', 'Sell', 'Hold')
+
+SIGNAL_LABELS = {
+    'MACD_Trade_Signal': TRADE_LABELS,
+    'OBV_Signal': TRADE_LABELS,
+    'BB_Signal': TRADE_LABELS,
+    'Stoch_Signal': TRADE_LABELS,
+    'ADX_Signal': TRADE_LABELS,
+    'RSI_Signal': TRADE_LABELS,
+    'Important_Signal': TRADE_LABELS,
+    'Signal': TRADE_LABELS,
+    'EMA_signal': ('Golden Cross', 'Death Cross', 'Hold'),
+    'Position_vs_SMA20': ('Above', 'Below', 'None'),
+    'Position_vs_SMA50': ('Above', 'Below', 'None'),
+    'SR_Zone': ('Support', 'Resistance', 'None'),
+}
+
+
+def signal_code(up, down) -> np.ndarray:
+    """ترميز int8: ‎+1 عند up، ‎-1 عند down، وإلا 0."""
+    return np.where(up, 1, np.where(down, -1, 0)).astype(np.int8)
+
+
+def decode_signal(codes, column: str) -> np.ndarray:
+    """تحويل رموز int8 إلى تسميات العمود."""
+    buy, sell, hold = SIGNAL_LABELS[column]
+    # الفهرس = code + 1  →  [-1, 0, +1]
+    labels = np.array([sell, hold, buy])
+    return labels[np.asarray(codes, dtype=np.int8) + 1]
+
+
+def encode_signal(values, column: str) -> np.ndarray:
+    """تحويل تسميات نصية إلى رموز int8 (تتجاهل المسافات وحالة الأحرف)."""
+    buy, sell, _ = SIGNAL_LABELS[column]
+    values = pd.Series(values).astype(str).str.strip().str.lower().to_numpy()
+    return signal_code(values == buy.lower(), values == sell.lower())
+
+
+def is_coded(series: pd.Series) -> bool:
+    return series.dtype == np.int8
+
+
+def decode_signal_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    نسخة من df مع تحويل أعمدة الإشارات المرمّزة (int8) إلى تسمياتها.
+    الأعمدة النصية تبقى كما هي، لذا الاستدعاء المتكرر آمن.
+    """
+    coded = [col for col in SIGNAL_LABELS if col in df.columns and is_coded(df[col])]
+    if not coded:
+        return df
+    df = df.copy()
+    for col in coded:
+        df[col] = decode_signal(df[col].to_numpy(), col)
+    return df
@@ -0,0 +1,135 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest import backtest_symbol, prepare_history, replay_decisions, simulate_trades
+
+
+def _ohlcv(seed: int, n: int = 300) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    open_ = close * (1 + rng.normal(0, 0.005, n))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.01, n)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.01, n)))
+    return pd.DataFrame({
+        'Date': pd.date_range('2020-01-01', periods=n, freq='B'),
+        'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Adj Close': close,
+        'Volume': rng.integers(100_000, 1_000_000, n),
+    })
+
+
+# ===============================
+# replay_decisions vs analyze_data
+# ===============================
+
+@pytest.mark.parametrize('overall_score', [85, 30])
+def test_replay_matches_analyze_data_on_prefixes(overall_score):
+    pytest.importorskip('yfinance')
+    from main_analysis import analyze_data
+
+    data = _ohlcv(5)
+    financial_analysis = {'overall_score': overall_score, 'ratios': {}}
+    # القرارات محسوبة مرة واحدة على التاريخ كاملاً: صف اليوم k يجب أن يساوي
+    # analyze_data على البيانات حتى اليوم k فقط (لا look-ahead)
+    decisions = replay_decisions(prepare_history(data), financial_analysis)
+    for k in (150, 201, 252, 300):
+        analysis = analyze_data(data.iloc[:k].copy(), {'basic_info': {}}, 10000, None, financial_analysis)
+        row = decisions[decisions['Date'] == data['Date'].iloc[k - 1]].iloc[0]
+        assert (row['decision'], row['prediction']) == (analysis['decision'], analysis['prediction']), k
+        assert row['entry_point'] == analysis['entry_point'], k
+        assert row['exit_point'] == analysis['exit_point'], k
+        assert row['stop_loss'] == analysis['stop_loss'], k
+
+
+# ===============================
+# simulate_trades on a hand-built path
+# ===============================
+
+def _path(bars):
+    """bars: قائمة (Open, High, Low, Close)."""
+    frame = pd.DataFrame(bars, columns=['Open', 'High', 'Low', 'Close'])
+    frame.insert(0, 'Date', pd.date_range('2024-01-01', periods=len(bars), freq='B'))
+    return frame
+
+
+def _decisions(history, decision, entry, exit_, stop):
+    n = len(history)
+    side = 'long' if decision == 'Buy' else 'short'
+    other = 'short' if side == 'long' else 'long'
+    frame = pd.DataFrame({'Date': history['Date'], 'decision': [decision] + ['Hold'] * (n - 1)})
+    frame[f'{side}_entry'], frame[f'{side}_exit'], frame[f'{side}_stop'] = entry, exit_, stop
+    frame[f'{other}_entry'] = frame[f'{other}_exit'] = frame[f'{other}_stop'] = np.nan
+    return frame
+
+
+def test_long_limit_fill_then_target():
+    history = _path([
+        (102, 103, 101.5, 102),   # 0: إشارة شراء
+        (102, 103, 101, 102),     # 1: لم يلمس 100
+        (100.5, 101, 99.5, 100),  # 2: تنفيذ عند 100
+        (100, 104, 99, 103),      # 3
+        (105, 111, 104, 110),     # 4: الهدف 110
+        (110, 111, 109, 110),
+    ])
+    trades = simulate_trades(history, _decisions(history, 'Buy', 100.0, 110.0, 95.0))
+    trade = trades.iloc[0]
+    assert len(trades) == 1
+    assert trade['entry_date'] == history['Date'][2] and trade['entry_price'] == 100.0
+    assert trade['stop_price'] == 95.0 and trade['target_price'] == 110.0
+    assert trade['exit_date'] == history['Date'][4] and trade['exit_price'] == 110.0
+    assert trade['exit_reason'] == 'target' and trade['bars_held'] == 2
+
+
+def test_long_gap_fill_reprices_stop_and_checks_fill_bar():
+    history = _path([
+        (102, 103, 101, 102),   # 0: إشارة شراء، الدخول 100 فوق أول افتتاح تالٍ
+        (90, 91, 85, 86),       # 1: تنفيذ عند الافتتاح 90، الوقف 85.5 يُلمس في نفس الشمعة
+        (86, 87, 84, 85),
+    ])
+    trades = simulate_trades(history, _decisions(history, 'Buy', 100.0, 110.0, 95.0))
+    trade = trades.iloc[0]
+    assert trade['entry_price'] == 90.0
+    assert trade['stop_price'] == 85.5
+    assert trade['exit_date'] == history['Date'][1] and trade['exit_price'] == 85.5
+    assert trade['exit_reason'] == 'stop_loss' and trade['pnl'] < 0
+
+
+def test_short_gap_fill_target_on_fill_bar():
+    history = _path([
+        (98, 99, 97, 98),       # 0: إشارة بيع عند 100
+        (104, 105, 94, 95),     # 1: تنفيذ عند 104، الهدف 95 في نفس الشمعة
+        (95, 96, 94, 95),
+    ])
+    trades = simulate_trades(history, _decisions(history, 'Sell', 100.0, 95.0, 105.0))
+    trade = trades.iloc[0]
+    assert trade['side'] == 'Short' and trade['entry_price'] == 104.0
+    assert trade['stop_price'] == 109.2
+    assert trade['exit_price'] == 95.0 and trade['exit_reason'] == 'target'
+    assert trade['pnl'] > 0
+
+
+def test_timeout_exits_at_close():
+    history = _path([(100, 101, 99, 100)] + [(100, 101, 99.5, 100.5)] * 6)
+    trades = simulate_trades(history, _decisions(history, 'Buy', 100.0, 120.0, 95.0), max_hold=3)
+    trade = trades.iloc[0]
+    assert trade['exit_reason'] == 'timeout' and trade['bars_held'] == 3
+    assert trade['exit_price'] == 100.5
+
+
+# ===============================
+# Stops on the loss side of the fill
+# ===============================
+
+@pytest.mark.parametrize('seed', range(4))
+@pytest.mark.parametrize('overall_score', [85, 30])
+def test_stops_are_on_loss_side_of_fill(seed, overall_score):
+    trades = backtest_symbol(_ohlcv(seed, 400), {'overall_score': overall_score, 'ratios': {}},
+                             signal_column='Signal')['trades']
+    assert len(trades)
+    long_side = trades['side'] == 'Long'
+    assert (trades.loc[long_side, 'stop_price'] < trades.loc[long_side, 'entry_price']).all()
+    assert (trades.loc[~long_side, 'stop_price'] > trades.loc[~long_side, 'entry_price']).all()
+    assert (trades.loc[long_side, 'target_price'] > trades.loc[long_side, 'entry_price']).all()
+    assert (trades.loc[~long_side, 'target_price'] < trades.loc[~long_side, 'entry_price']).all()
+    stopped = trades[trades['exit_reason'] == 'stop_loss']
+    assert (stopped['pnl'] <= 0).all()
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from compute_indicators import compute_obv
+
+
+def _loop_obv(data: pd.DataFrame) -> pd.Series:
+    """الحلقة الأصلية من calculate_technical_indicators (المرجع)."""
+    obv = [0]
+    for i in range(1, len(data)):
+        if data['Close'].iat[i] > data['Close'].iat[i-1]:
+            obv.append(obv[-1] + data['Volume'].iat[i])
+        elif data['Close'].iat[i] < data['Close'].iat[i-1]:
+            obv.append(obv[-1] - data['Volume'].iat[i])
+        else:
+            obv.append(obv[-1])
+    out = data.copy()
+    out['OBV'] = obv
+    return out['OBV']
+
+
+def _frame(seed: int, n: int, int_volume: bool, flat_runs: bool) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n)).round(2)
+    if flat_runs:
+        # فترات إغلاق ثابت (تغير صفري) بأطوال مختلفة
+        for start in rng.choice(n - 10, size=n // 50, replace=False):
+            close[start:start + rng.integers(2, 10)] = close[start]
+    if int_volume:
+        volume = rng.integers(1_000, 5_000_000, n)
+    else:
+        volume = rng.uniform(1_000, 5_000_000, n)
+    return pd.DataFrame({'Close': close, 'Volume': volume})
+
+
+@pytest.mark.parametrize('int_volume', [True, False])
+@pytest.mark.parametrize('flat_runs', [True, False])
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_compute_obv_matches_loop(seed, int_volume, flat_runs):
+    data = _frame(seed, 2_000, int_volume, flat_runs)
+    expected = _loop_obv(data)
+
+    out = data.copy()
+    out['OBV'] = compute_obv(data['Close'], data['Volume'])
+
+    assert out['OBV'].dtype == expected.dtype
+    assert np.array_equal(out['OBV'].to_numpy(), expected.to_numpy())
+
+
+def test_compute_obv_all_flat():
+    data = pd.DataFrame({'Close': np.full(50, 10.0), 'Volume': np.arange(50)})
+    expected = _loop_obv(data)
+
+    out = data.copy()
+    out['OBV'] = compute_obv(data['Close'], data['Volume'])
+
+    assert out['OBV'].dtype == expected.dtype
+    assert np.array_equal(out['OBV'].to_numpy(), expected.to_numpy())
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from compute_indicators import calculate_technical_indicators
+from panel_indicators import compute_panel_indicators, panel_from_frames
+
+INDICATORS = (
+    'RSI_7', 'RSI_14', 'RSI_21', 'MACD', 'MACD_Signal', 'MACD_Histogram',
+    'BB_Middle', 'BB_Upper', 'BB_Lower', 'Bollinger_%B', 'Stoch_K', 'Stoch_D',
+    'ADX', 'Plus_DI', 'Minus_DI', 'ATR_14', 'OBV',
+)
+
+
+def _frame(seed: int, dates: pd.DatetimeIndex) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    n = len(dates)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    return pd.DataFrame({
+        'Date': dates,
+        'Close': close,
+        'High': close + rng.uniform(0.1, 2, n),
+        'Low': close - rng.uniform(0.1, 2, n),
+        'Open': close + rng.normal(0, 0.5, n),
+        'Volume': rng.integers(1_000, 1_000_000, n).astype(float),
+    })
+
+
+def _assert_matches(frames):
+    panel = panel_from_frames(frames)
+    result = compute_panel_indicators(panel['Close'], panel['High'], panel['Low'], panel['Volume'])
+    for symbol, df in frames.items():
+        expected = calculate_technical_indicators(df)[0].set_index('Date')
+        for name in INDICATORS:
+            got = result[name][symbol].reindex(expected.index)
+            # الصفوف خارج تواريخ السهم تبقى NaN
+            assert result[name][symbol].drop(pd.DatetimeIndex(df['Date'])).isna().all(), (symbol, name)
+            np.testing.assert_allclose(got.to_numpy(dtype=float), expected[name].to_numpy(dtype=float),
+                                       rtol=1e-10, atol=1e-8, equal_nan=True, err_msg=f"{symbol} {name}")
+
+
+def test_panel_matches_per_symbol_common_calendar():
+    dates = pd.bdate_range('2023-01-02', periods=300)
+    _assert_matches({f'S{k}': _frame(k, dates) for k in range(4)})
+
+
+def test_panel_matches_per_symbol_late_listing():
+    dates = pd.bdate_range('2023-01-02', periods=300)
+    _assert_matches({'A': _frame(0, dates), 'B': _frame(1, dates[120:])})
+
+
+@pytest.mark.parametrize('missing', [[40], [40, 41, 90], [150, 220]])
+def test_panel_matches_per_symbol_mid_history_gap(missing):
+    dates = pd.bdate_range('2023-01-02', periods=300)
+    frames = {
+        'A': _frame(0, dates),
+        'B': _frame(1, dates.delete(missing)),
+        'C': _frame(2, dates[60:].delete([100])),
+    }
+    _assert_matches(frames)
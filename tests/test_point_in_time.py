@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from compute_indicators import calculate_technical_indicators
+
+
+def _ohlcv(seed: int, n: int, trend_bars: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0, 0.02, n)
+    # اتجاه صاعد مستمر في البداية: لا قمم/قيعان مؤكدة فتطول فترة الإحماء
+    returns[:trend_bars] = 0.01
+    close = 100 * np.exp(np.cumsum(returns))
+    return pd.DataFrame({
+        'Date': pd.date_range('2020-01-01', periods=n, freq='B'),
+        'Open': close * (1 + rng.normal(0, 0.005, n)),
+        'High': close * 1.01, 'Low': close * 0.99, 'Close': close,
+        'Volume': rng.integers(100_000, 1_000_000, n),
+    })
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+@pytest.mark.parametrize('n, trend_bars', [(80, 0), (300, 0), (300, 120)])
+def test_point_in_time_keeps_default_rows(seed, n, trend_bars):
+    df = _ohlcv(seed, n, trend_bars)
+    default, _, _ = calculate_technical_indicators(df)
+    point_in_time, _, _ = calculate_technical_indicators(df, point_in_time=True)
+
+    assert len(point_in_time) == len(default)
+    assert point_in_time['Date'].equals(default['Date'])
+    shared = [c for c in default.columns if c not in ('Long_Resistance', 'Long_Support')]
+    pd.testing.assert_frame_equal(point_in_time[shared], default[shared])
+
+
+def test_point_in_time_levels_are_nan_only_during_warmup():
+    df = _ohlcv(0, 300, trend_bars=120)
+    data, _, _ = calculate_technical_indicators(df, point_in_time=True)
+    for col in ('Long_Resistance', 'Long_Support'):
+        values = data[col]
+        first = values.first_valid_index()
+        assert first is not None
+        assert values.loc[first:].notna().all(), col
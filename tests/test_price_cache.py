@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import price_cache
+
+T = pd.Timestamp
+
+
+def test_missing_ranges_between_intervals():
+    coverage = [(T('2020-01-01'), T('2021-01-01')), (T('2023-01-01'), T('2024-01-01'))]
+    assert price_cache.missing_ranges(coverage, '2020-06-01', '2023-06-01') == [(T('2021-01-01'), T('2023-01-01'))]
+    assert price_cache.missing_ranges(coverage, '2020-02-01', '2020-03-01') == []
+    assert price_cache.missing_ranges(None, '2020-01-01', '2020-02-01') == [(T('2020-01-01'), T('2020-02-01'))]
+
+
+def test_update_coverage_merges_touching_intervals():
+    coverage = [(T('2020-01-01'), T('2021-01-01'))]
+    fetched = [(T('2021-01-01'), T('2022-01-01')), (T('2023-01-01'), T('2024-01-01'))]
+    assert price_cache.update_coverage(coverage, fetched) == [
+        (T('2020-01-01'), T('2022-01-01')), (T('2023-01-01'), T('2024-01-01')),
+    ]
+
+
+@pytest.fixture
+def fake_download(tmp_path, monkeypatch):
+    """yf.download وهمي يعيد أيام العمل فقط ويسجل كل طلب."""
+    yf = pytest.importorskip('yfinance')
+    import import_fetch_technical
+
+    monkeypatch.setattr(price_cache, 'PRICE_CACHE_DIR', str(tmp_path))
+    calls = []
+
+    def download(symbol, start=None, end=None, **kwargs):
+        calls.append((T(start), T(end)))
+        dates = pd.bdate_range(T(start), T(end) - pd.Timedelta(days=1), name='Date')
+        close = 100 + np.arange(len(dates), dtype=float)
+        return pd.DataFrame({'Close': close, 'High': close + 1, 'Low': close - 1,
+                             'Open': close, 'Volume': 1000.0}, index=dates)
+
+    monkeypatch.setattr(yf, 'download', download)
+    return import_fetch_technical, calls
+
+
+def test_weekend_gap_is_covered_after_successful_empty_download(fake_download):
+    fetch, calls = fake_download
+    # الجمعة 2024-01-05 آخر يوم مغطى؛ 6-7 يناير عطلة نهاية أسبوع
+    fetch.fetch_technical_data('AAA', '2024-01-01', '2024-01-06')
+    fetch.fetch_technical_data('AAA', '2024-01-01', '2024-01-08')
+    assert calls[-1] == (T('2024-01-06'), T('2024-01-08'))
+
+    downloads = len(calls)
+    data = fetch.fetch_technical_data('AAA', '2024-01-01', '2024-01-08')
+    assert len(calls) == downloads
+    assert len(data) == 5
+
+
+def test_failed_download_does_not_extend_coverage(fake_download, monkeypatch):
+    fetch, calls = fake_download
+    fetch.fetch_technical_data('AAA', '2024-01-01', '2024-02-01')
+    monkeypatch.setattr(fetch, '_download', lambda symbol, start, end: None)
+    fetch.fetch_technical_data('AAA', '2024-01-01', '2024-03-01')
+    _, coverage = price_cache.load_prices('AAA')
+    assert coverage == [(T('2024-01-01'), T('2024-02-01'))]
@@ -22,11 +22,12 @@ from import_fetch_technical import fetch_technical_data
 from fetch_fundamental import fetch_fundamental_data
 from compute_indicators import calculate_technical_indicators
 from analyze_signals import analyze_technical_signals
-from analyze_financial import analyze_financial_performance
-from price_targets import calculate_price_targets
+from analysis_cache import cached_financial_performance
+from price_targets import LevelIndex, calculate_price_targets
 from main_analysis import analyze_data
 from save_to_excel import save_report
 from create_price_chart import create_price_target_chart
+from signal_codes import decode_signal_columns
 
 warnings.filterwarnings('ignore')
 
@@ -471,6 +472,21 @@ def render_sr_dashboard_inline(analysis, current_price=205.50):
         "fib_levels": {k: float(v) for k, v in fib_levels.items()},
         "current_price": float(current_price)
     }
+
+    # أقرب دعم/مقاومة للسعر الحالي من كل المستويات (bisect على مستويات مرتبة)
+    levels = LevelIndex({k: v for k, v in data["pivot_levels"].items() if v > 0})
+    for name, value in data["fib_levels"].items():
+        levels.add(name, value)
+    for zone in data["sr_zones"]:
+        levels.add("SR_Zone", zone[0])
+        levels.add("SR_Zone", zone[1])
+    nearest_support = levels.below(data["current_price"])
+    nearest_resistance = levels.above(data["current_price"], strict=True)
+    nearest_text = (
+        f"🟢 {nearest_support:.2f}" if nearest_support is not None else "🟢 —"
+    ) + " | " + (
+        f"🔴 {nearest_resistance:.2f}" if nearest_resistance is not None else "🔴 —"
+    )
     
     # HTML Template
     html_template = f"""
@@ -590,6 +606,7 @@ def render_sr_dashboard_inline(analysis, current_price=205.50):
                 <div class="current-price">
                     <span>💹 Current Price</span>
                     <span class="price-value">{data['current_price']:.2f}</span>
+                    <span>Nearest S/R: {nearest_text}</span>
                 </div>
             </div>
             
@@ -783,7 +800,7 @@ if submitted:
             st.stop()
 
         # 4) تحليل الأداء المالي
-        financial_analysis = analyze_financial_performance(
+        financial_analysis = cached_financial_performance(
             fundamental_data["financials"],
             fundamental_data["balance_sheet"],
             fundamental_data["cashflow"],
@@ -792,6 +809,7 @@ if submitted:
             fundamental_data["quarterly_cashflow"],
             fundamental_data["basic_info"],
             industry_pe,
+            use_disk=True,
         )
 
         # 5) التحليل الرئيسي
@@ -801,6 +819,7 @@ if submitted:
             investment_amount,
             industry_pe,
             financial_analysis,
+            compact_signals=True,
         )
 
         # 6) إنشاء التقارير
@@ -975,7 +994,7 @@ if 'analysis' in st.session_state and st.session_state['analysis'] is not None:
         st.subheader("📊 Comprehensive Technical Analysis")
         
         # Get latest technical data
-        technical_df = st.session_state['analysis']['technical_data']
+        technical_df = decode_signal_columns(st.session_state['analysis']['technical_data'])
         latest = technical_df.iloc[-1]
         prev = technical_df.iloc[-2] if len(technical_df) > 1 else latest
         
@@ -1066,7 +1085,7 @@ if 'analysis' in st.session_state and st.session_state['analysis'] is not None:
             """)
 
         # Technical Data Display
-        df_tech = st.session_state.analysis['technical_data'].copy()
+        df_tech = decode_signal_columns(st.session_state.analysis['technical_data']).copy()
         df_tech['Date'] = pd.to_datetime(df_tech['Date']).dt.date
 
         # Column definitions
@@ -1368,7 +1387,20 @@ if 'analysis' in st.session_state and st.session_state['analysis'] is not None:
                 delta_color="normal" if current_ratio > 1.2 else "inverse",
                 help="Ability to pay short-term obligations"
             )
-        
+
+        trends = fin.get('trend_analysis', {})
+        if trends.get('annual_periods') or trends.get('quarterly_periods'):
+            def fmt_pct(value):
+                return f"{value:.1f}%" if value is not None else "N/A"
+            st.markdown(
+                f"**📆 Multi-period Trend:** {trends.get('trend_rating', '')} "
+                f"({trends.get('trend_score', 0)}/100) | "
+                f"Revenue CAGR: {fmt_pct(trends.get('revenue_cagr_%'))} "
+                f"({trends.get('annual_periods', 0)} yrs) | "
+                f"TTM YoY: {fmt_pct(trends.get('ttm_yoy_growth_%'))} | "
+                f"Net Margin Slope: {fmt_pct(trends.get('net_margin_slope'))}/yr"
+            )
+
         st.markdown("---")
         
 # === 3. تحليل تفصيلي منظم ===